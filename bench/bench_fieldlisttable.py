@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark the t3-field-list-table directive.
+
+Synthetic ``t3-field-list-table`` sources of any size are generated and
+parsed with docutils. The time spent in each phase of
+``FieldListTable.run2()`` is measured and written as JSON. A previous
+result file can be given as baseline to detect slowdowns.
+
+Examples::
+
+   # run the default suite and store the result
+   python bench/bench_fieldlisttable.py --save bench-result.json
+
+   # one custom scenario
+   python bench/bench_fieldlisttable.py --rows 5000 --cols 8 \\
+       --rowspan 0.05 --colspan 0.05 --comments 0.02 --markup inline
+
+   # compare against a stored baseline, exit status 1 on regression
+   python bench/bench_fieldlisttable.py --baseline bench-baseline.json
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+
+import argparse
+import json
+import platform
+import random
+import sys
+from timeit import default_timer
+
+import docutils
+from docutils import nodes
+from docutils.core import publish_doctree
+from docutils.parsers.rst.directives import register_directive
+
+from sphinxcontrib.t3fieldlisttable import FieldListTable
+
+PHASES = [
+    'prescan',
+    'scanContentLines',
+    'nested_parse',
+    'parseCellBodies',
+    'parseDataFile',
+    'checkBulletList',
+    'removeComments',
+    'processDefinitionRow',
+    'adjustColumnWidths',
+    'checkAlignments',
+    'processDataRows',
+    'checkTableDimensions',
+    'checkRowspans',
+    'buildTableFromFieldList',
+    'buildTableInOnePass',
+]
+
+DEFAULT_SUITE = [
+    # name, rows, cols, rowspan, colspan, comments, markup
+    ('small-plain',        50, 4, 0.0,  0.0,  0.0,  'plain'),
+    ('medium-spans',      500, 6, 0.05, 0.05, 0.02, 'inline'),
+    ('large-plain',      5000, 8, 0.0,  0.0,  0.0,  'plain'),
+    ('large-spans',      5000, 8, 0.05, 0.05, 0.02, 'inline'),
+    ('long-rowspans',    2000, 4, 0.01, 0.0,  0.0,  'plain', 500),
+    ('complex-markup',    300, 5, 0.02, 0.02, 0.05, 'complex'),
+    ('repeated-cells',   3000, 6, 0.0,  0.0,  0.0,  'repeated'),
+]
+
+MARKUP = {
+    'plain': ['Cell %(row)s/%(col)s'],
+    'inline': ['Some *emphasis*, ``literal`` and **strong** text in '
+               'cell %(row)s/%(col)s.'],
+    # few distinct cell texts, like 'string' or 'Default: 0' in reference
+    # manuals
+    'repeated': ['Default: %(col)s'],
+    'complex': ['First paragraph of cell %(row)s/%(col)s with '
+                '*emphasis* and ``code``.',
+                '',
+                '- nested item one',
+                '- nested item two',
+                '',
+                'Example::',
+                '',
+                '   $x = %(row)s;'],
+}
+
+
+def makeTableSource(rows, cols, rowspan=0.0, colspan=0.0, comments=0.0,
+                    markup='plain', maxRowspan=8, seed=1):
+    """Return the rst source of one ``t3-field-list-table`` directive.
+
+    `rows` is the number of body rows and `cols` the number of columns.
+    `rowspan`, `colspan` and `comments` are probabilities between 0 and 1.
+    The generated table always is valid.
+    """
+    rnd = random.Random(seed)
+    columnIds = ['c%s' % i for i in range(cols)]
+    bodyLines = MARKUP[markup]
+    out = ['.. t3-field-list-table::',
+           ' :definition-row: yes',
+           ' :header-rows: 1',
+           '']
+
+    def addRow(fields):
+        lines = []
+        for name, bodyArgs in fields:
+            lines.append('   :%s:' % name)
+            if bodyArgs is not None:
+                for line in bodyLines:
+                    lines.append(line and '      ' + line % bodyArgs)
+        lines[0] = ' * ' + lines[0][3:]
+        out.extend(lines)
+        out.append('')
+
+    # definition row and header row
+    addRow([(cid, None) for cid in columnIds])
+    addRow([(cid, {'row': 'head', 'col': i})
+            for i, cid in enumerate(columnIds)])
+
+    # per column: [remaining rows, range, first column, last column]
+    openSpans = [None] * cols
+    for rowNum in range(rows):
+        if rnd.random() < comments:
+            out.append(' * :-----:')
+            out.append('')
+        fields = []
+        col = 0
+        while col < cols:
+            span = openSpans[col]
+            if span is not None:
+                fields.append(('(%s)' % span[1], None))
+                span[0] -= 1
+                if not span[0]:
+                    openSpans[col] = None
+                col = span[3] + 1
+                continue
+            lastCol = col
+            if rnd.random() < colspan and col + 1 < cols:
+                lastCol = min(cols - 1, col + rnd.randint(1, 3))
+                for i in range(col + 1, lastCol + 1):
+                    if openSpans[i] is not None:
+                        lastCol = i - 1
+                        break
+            if lastCol > col:
+                columnIdRange = '%s..%s' % (columnIds[col],
+                                            columnIds[lastCol])
+            else:
+                columnIdRange = columnIds[col]
+            fields.append((columnIdRange, {'row': rowNum, 'col': col}))
+            rowsLeft = rows - rowNum - 1
+            if rowsLeft and rnd.random() < rowspan:
+                following = rnd.randint(1, min(maxRowspan, rowsLeft))
+                openSpans[col] = [following, columnIdRange, col, lastCol]
+            col = lastCol + 1
+        if rnd.random() < comments:
+            fields.append(('-----', {'row': rowNum, 'col': 'comment'}))
+        addRow(fields)
+    return '\n'.join(out) + '\n'
+
+
+class TimedFieldListTable(FieldListTable):
+
+    """FieldListTable that adds up the phase timings of all tables."""
+
+    totals = {}
+
+    def run(self):
+        result = FieldListTable.run(self)
+        self.addTiming('total', self.elapsed)
+        for phase, seconds in self.timings:
+            self.addTiming(phase, seconds)
+        return result
+
+    def addTiming(self, phase, seconds):
+        totals = TimedFieldListTable.totals
+        totals[phase] = totals.get(phase, 0.0) + seconds
+
+
+def runScenario(source, repeat, engine='classic', cellCacheSize=0):
+    """Parse `source` `repeat` times and return the best timings."""
+    register_directive('t3-field-list-table', TimedFieldListTable)
+    best = None
+    for i in range(repeat):
+        TimedFieldListTable.totals = {}
+        t0 = default_timer()
+        doctree = publish_doctree(source, settings_overrides={
+            'report_level': 5, 'halt_level': 5, 'warning_stream': False,
+            '_disable_config': True, 'field_list_table_instrument': True,
+            'field_list_table_time_budget': 0,
+            'field_list_table_engine': engine,
+            'field_list_table_cell_cache_size': cellCacheSize})
+        publish = default_timer() - t0
+        findall = getattr(doctree, 'findall', None) or doctree.traverse
+        for msg in findall(nodes.system_message):
+            if msg['level'] >= 3:
+                raise RuntimeError('Benchmark table is not valid: %s'
+                                   % msg.astext()[:500])
+        timings = dict(TimedFieldListTable.totals)
+        timings['publish'] = publish
+        if best is None or timings['total'] < best['total']:
+            best = timings
+    return best
+
+
+def runSuite(scenarios, repeat, engine='classic', cellCacheSize=0):
+    results = []
+    for scenario in scenarios:
+        (name, rows, cols, rowspan, colspan, comments,
+         markup) = scenario[:7]
+        maxRowspan = scenario[7] if len(scenario) > 7 else 8
+        source = makeTableSource(rows, cols, rowspan, colspan, comments,
+                                 markup, maxRowspan)
+        timings = runScenario(source, repeat, engine, cellCacheSize)
+        results.append({
+            'name': name,
+            'params': {'rows': rows, 'cols': cols, 'rowspan': rowspan,
+                       'colspan': colspan, 'comments': comments,
+                       'markup': markup, 'maxRowspan': maxRowspan},
+            'sourceLines': source.count('\n'),
+            'timings': timings,
+        })
+        print('%-16s total %8.4fs  publish %8.4fs' %
+              (name, timings['total'], timings['publish']))
+    return results
+
+
+def compareWithBaseline(results, baseline, tolerance):
+    """Print a comparison and return the number of regressions."""
+    baseByName = dict((r['name'], r) for r in baseline['scenarios'])
+    regressions = 0
+    print()
+    print('%-16s %-24s %10s %10s %8s' % ('scenario', 'phase', 'baseline',
+                                         'current', 'ratio'))
+    for result in results:
+        base = baseByName.get(result['name'])
+        if base is None:
+            continue
+        for phase in ['total'] + PHASES:
+            old = base['timings'].get(phase)
+            new = result['timings'].get(phase)
+            if not old or new is None:
+                continue
+            ratio = new / old
+            flag = ''
+            if phase == 'total' and ratio > 1.0 + tolerance:
+                flag = '  <-- slower'
+                regressions += 1
+            print('%-16s %-24s %10.4f %10.4f %8.2f%s' %
+                  (result['name'], phase, old, new, ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the t3-field-list-table directive.')
+    parser.add_argument('--rows', type=int,
+                        help='run a single scenario with this many rows')
+    parser.add_argument('--cols', type=int, default=6)
+    parser.add_argument('--rowspan', type=float, default=0.0,
+                        help='probability that a cell starts a rowspan')
+    parser.add_argument('--colspan', type=float, default=0.0,
+                        help='probability that a cell is a colspan')
+    parser.add_argument('--comments', type=float, default=0.0,
+                        help='probability of comment rows and fields')
+    parser.add_argument('--max-rowspan', type=int, default=8)
+    parser.add_argument('--markup', choices=sorted(MARKUP), default='plain')
+    parser.add_argument('--engine', choices=['classic', 'fused', 'streaming'],
+                        default='classic')
+    parser.add_argument('--cell-cache-size', type=int, default=0,
+                        help='memoize this many parsed cell bodies')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='keep the best of this many runs')
+    parser.add_argument('--save', metavar='FILE',
+                        help='write the results as JSON')
+    parser.add_argument('--baseline', metavar='FILE',
+                        help='compare with the results in FILE')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown of the total time')
+    parser.add_argument('--dump-source', action='store_true',
+                        help='print the generated rst source and exit')
+    args = parser.parse_args(argv)
+
+    if args.rows is None:
+        scenarios = DEFAULT_SUITE
+    else:
+        scenarios = [('custom', args.rows, args.cols, args.rowspan,
+                      args.colspan, args.comments, args.markup,
+                      args.max_rowspan)]
+    if args.dump_source:
+        for scenario in scenarios:
+            print(makeTableSource(*scenario[1:]))
+        return 0
+
+    results = runSuite(scenarios, args.repeat, args.engine,
+                       args.cell_cache_size)
+    data = {
+        'engine': args.engine,
+        'cellCacheSize': args.cell_cache_size,
+        'python': platform.python_version(),
+        'docutils': docutils.__version__,
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'scenarios': results,
+    }
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compareWithBaseline(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark writing the cells of large tables with ``rst2html_typo3.py``.
+
+A table of ``--rows`` times ``--cols`` cells is parsed once. The doctree
+is then written as HTML with the ``MyHTMLTranslator`` of
+``rst2html_typo3.py`` and with a copy of its former ``visit_entry``, which
+looked up the stubs and split the alignment for every cell. Both results
+must be the same.
+
+Example::
+
+   python bench/bench_html_entries.py --rows 2000 --cols 8
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+
+import argparse
+import copy
+import os
+import sys
+from timeit import default_timer
+
+from docutils import io, nodes
+from docutils.core import Publisher
+from docutils.parsers.rst.directives import register_directive
+
+from sphinxcontrib.t3fieldlisttable import FieldListTable
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'documentation', '06-The-[field-list-table]-directive'))
+
+from bench_fieldlisttable import makeTableSource
+import rst2html_typo3
+
+
+class LegacyHTMLTranslator(rst2html_typo3.MyHTMLTranslator):
+
+    """The translator with ``visit_entry`` as it was before."""
+
+    def visit_entry(self, node):
+        atts = {}
+        atts['class'] = []
+        if isinstance(node.parent.parent, nodes.thead):
+            atts['class'].append('head')
+        if node.parent.parent.parent.stubs[node.parent.column]:
+            atts['class'].append('stub')
+        if atts['class']:
+            tagname = 'th'
+        else:
+            tagname = 'td'
+        if 'align' in node:
+            atts['class'].extend(node['align'].split(' '))
+        if atts['class']:
+            atts['class'] = ' '.join(atts['class'])
+        else:
+            del atts['class']
+        node.parent.column += 1
+        if 'morerows' in node:
+            atts['rowspan'] = node['morerows'] + 1
+        if 'morecols' in node:
+            atts['colspan'] = node['morecols'] + 1
+            node.parent.column += node['morecols']
+        self.body.append(self.starttag(node, tagname, '', **atts))
+        self.context.append('</%s>\n' % tagname.lower())
+        if len(node) == 0:              # empty cell
+            self.body.append('&nbsp;')
+        self.set_first_last(node)
+
+
+def parseWithHtmlSettings(source):
+    """Return the doctree of `source` with the settings of the writer."""
+    pub = Publisher(source_class=io.StringInput,
+                    destination_class=io.NullOutput)
+    pub.set_components('standalone', 'restructuredtext', 'html4css1')
+    pub.process_programmatic_settings(None, {
+        '_disable_config': True, 'report_level': 5, 'halt_level': 5,
+        'warning_stream': False}, None)
+    pub.set_source(source)
+    pub.document = pub.reader.read(pub.source, pub.parser, pub.settings)
+    pub.apply_transforms()
+    return pub.document
+
+
+def writeHtml(doctree, translatorClass):
+    """Return the HTML body of `doctree` and the seconds needed."""
+    # set_first_last() changes the doctree
+    reporter = doctree.reporter
+    doctree = copy.deepcopy(doctree)
+    doctree.reporter = reporter
+    translator = translatorClass(doctree)
+    t0 = default_timer()
+    doctree.walkabout(translator)
+    seconds = default_timer() - t0
+    return ''.join(translator.body), seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark writing large tables as HTML.')
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--cols', type=int, default=8)
+    parser.add_argument('--rowspan', type=float, default=0.02)
+    parser.add_argument('--colspan', type=float, default=0.02)
+    parser.add_argument('--stub-columns', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='keep the best of this many runs')
+    args = parser.parse_args(argv)
+
+    source = makeTableSource(args.rows, args.cols, args.rowspan,
+                             args.colspan)
+    source = source.replace(' :header-rows: 1',
+                            ' :header-rows: 1\n :stub-columns: %s'
+                            % args.stub_columns, 1)
+    register_directive('t3-field-list-table', FieldListTable)
+    doctree = parseWithHtmlSettings(source)
+    findall = getattr(doctree, 'findall', None) or doctree.traverse
+    cells = len(list(findall(nodes.entry)))
+
+    best = {}
+    bodies = {}
+    for i in range(args.repeat):
+        for name, translatorClass in (
+                ('legacy', LegacyHTMLTranslator),
+                ('current', rst2html_typo3.MyHTMLTranslator)):
+            body, seconds = writeHtml(doctree, translatorClass)
+            bodies[name] = body
+            best[name] = min(best.get(name, seconds), seconds)
+    if bodies['legacy'] != bodies['current']:
+        print('The HTML output differs.')
+        return 1
+    print('%s cells' % cells)
+    for name in ('legacy', 'current'):
+        print('%-8s %8.4fs' % (name, best[name]))
+    print('speedup  %8.2fx' % (best['legacy'] / best['current']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
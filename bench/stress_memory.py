@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Run the t3-field-list-table directive many times and watch the memory.
+
+The same synthetic table is parsed again and again. After some warm-up
+runs, which fill the bounded caches, the memory still allocated after
+each run must not keep growing. The exit status is 1 if it grows by more
+than ``--max-growth`` bytes per run on average.
+
+Example::
+
+   python bench/stress_memory.py --runs 200 --rows 300 --cell-cache-size 64
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+from docutils import nodes
+from docutils.core import publish_doctree
+from docutils.parsers.rst.directives import register_directive
+
+from sphinxcontrib.t3fieldlisttable import FieldListTable
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_fieldlisttable import MARKUP, makeTableSource
+
+
+def parseOnce(source, settings):
+    doctree = publish_doctree(source, settings_overrides=settings)
+    findall = getattr(doctree, 'findall', None) or doctree.traverse
+    for msg in findall(nodes.system_message):
+        if msg['level'] >= 3:
+            raise RuntimeError('Stress table is not valid: %s'
+                               % msg.astext()[:500])
+
+
+def stress(source, runs, warmup, settings):
+    """Return the retained bytes after each run following the warm-up."""
+    register_directive('t3-field-list-table', FieldListTable)
+    for i in range(warmup):
+        parseOnce(source, settings)
+    gc.collect()
+    tracemalloc.start()
+    retained = []
+    try:
+        for i in range(runs):
+            parseOnce(source, settings)
+            gc.collect()
+            retained.append(tracemalloc.get_traced_memory()[0])
+    finally:
+        tracemalloc.stop()
+    return retained
+
+
+def growthPerRun(values):
+    """Return the slope of the least squares line through `values`."""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    meanX = (n - 1) / 2.0
+    meanY = sum(values) / float(n)
+    num = sum((x - meanX) * (y - meanY) for x, y in enumerate(values))
+    den = sum((x - meanX) ** 2 for x in range(n))
+    return num / den
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Detect memory growth over many directive runs.')
+    parser.add_argument('--runs', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--cols', type=int, default=6)
+    parser.add_argument('--rowspan', type=float, default=0.05)
+    parser.add_argument('--colspan', type=float, default=0.05)
+    parser.add_argument('--comments', type=float, default=0.02)
+    parser.add_argument('--markup', choices=sorted(MARKUP), default='inline')
+    parser.add_argument('--engine', choices=['classic', 'fused', 'streaming'],
+                        default='classic')
+    parser.add_argument('--cell-cache-size', type=int, default=0)
+    parser.add_argument('--max-growth', type=float, default=1024.0,
+                        help='allowed growth in bytes per run')
+    parser.add_argument('--save', metavar='FILE',
+                        help='write the retained bytes per run as JSON')
+    args = parser.parse_args(argv)
+
+    source = makeTableSource(args.rows, args.cols, args.rowspan,
+                             args.colspan, args.comments, args.markup)
+    settings = {
+        'report_level': 5, 'halt_level': 5, 'warning_stream': False,
+        '_disable_config': True,
+        'field_list_table_engine': args.engine,
+        'field_list_table_cell_cache_size': args.cell_cache_size,
+    }
+    retained = stress(source, args.runs, args.warmup, settings)
+    growth = growthPerRun(retained)
+    print('runs %s  first %s  last %s  growth %.1f bytes/run' % (
+        len(retained), retained[0], retained[-1], growth))
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'retained': retained, 'growth': growth}, f, indent=2)
+    if growth > args.max_growth:
+        print('Memory grows by more than %s bytes per run.' % args.max_growth)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
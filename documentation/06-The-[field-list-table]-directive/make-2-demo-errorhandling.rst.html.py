@@ -25,7 +25,15 @@ print("starting by importing 'rst2html_typo3'")
 print("If no 'Finished.' follows here there probably has been an error.")
 
 
-import rst2html_typo3
+import rst2html_server
+# a running rst2html_server.py is much faster
+if rst2html_server.convertWithServer(
+        '2-demo-errorhandling.rst', '2-demo-errorhandling.rst.html',
+        sys.argv[1:-2]):
+    print('Converted by rst2html_server.')
+else:
+    import rst2html_typo3
+    rst2html_typo3.main()
 
 print()
 print("Finished.")
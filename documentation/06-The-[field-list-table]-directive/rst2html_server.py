@@ -0,0 +1,402 @@
+#!/usr/bin/env python
+
+# Author: Martin Bless <martin.bless@gmail.com>
+# Copyright: This module has been placed in the public domain.
+
+"""
+A local HTTP server that converts reST to HTML like ``rst2html_typo3.py``.
+
+The docutils setup is done once at start. Requests are handled by a pool
+of worker processes that each keep a ready Publisher, so an answer takes
+no longer than the conversion itself. Start it with the options
+``rst2html_typo3.py`` would get::
+
+   python rst2html_server.py --source-link --stylesheet-path=styles.css
+
+Requests::
+
+   POST /convert   {"text": "<reST>", "path": "name.rst"}
+                   {"path": "1-demo.rst", "destination": "1-demo.rst.html",
+                    "options": ["--source-link"], "directory": "/docs"}
+                   returns the HTML
+   GET  /metrics   latency and throughput as JSON
+   GET  /health    {"status": "ok"}
+
+``path`` and ``destination`` must be inside the folder given by ``--root``
+(default: the current folder). Relative paths are relative to
+``directory``, the current folder of the client, or to the root folder,
+and stay relative in the messages if the client works in the root folder.
+``text`` may neither include files nor use raw content. Requests need the
+content type ``application/json``, and requests sent by web pages (with an
+``Origin`` header) are refused.
+
+``options`` are used instead of the options the server was started with.
+Only the options in ACCEPTED_OPTIONS are allowed and stylesheets must be
+inside the root folder. Relative paths in them are taken to be relative to
+the root folder, so ``directory``, the current folder of the client, has
+to be the root folder when ``options`` are given.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+
+import copy
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from timeit import default_timer
+
+from docutils import SettingsSpec
+from docutils.core import Publisher
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.request import Request, urlopen
+
+import rst2html_typo3
+
+DEFAULT_URL = 'http://127.0.0.1:8765'
+
+# Options a request may give. They change the HTML but neither read nor
+# write files other than the stylesheets, which are checked.
+ACCEPTED_OPTIONS = frozenset([
+    '--traceback', '--no-traceback',
+    '--source-link', '--no-source-link',
+    '--stylesheet-path', '--embed-stylesheet', '--link-stylesheet',
+    '--field-list-table-off',
+    '--field-list-table-instrument',
+    '--field-list-table-time-budget',
+    '--field-list-table-engine',
+    '--field-list-table-prescan',
+    '--field-list-table-cell-cache-size',
+    '--field-list-table-validate',
+    '--field-list-table-collect-errors',
+])
+
+
+class ServerSettingsSpec(SettingsSpec):
+    settings_spec = rst2html_typo3.MySettingsSpec.settings_spec + (
+        'Options of the conversion server',
+        None,
+        (('Address to listen on. Default: 127.0.0.1',
+          ['--host'],
+          {'default': '127.0.0.1'}),
+         ('Port to listen on. Default: 8765',
+          ['--port'],
+          {'metavar': '<port>', 'type': 'int', 'default': 8765}),
+         ('Folder the requested files have to be in. Default: the '
+          'current folder',
+          ['--root'],
+          {'metavar': '<folder>', 'default': None}),
+         ('Do not log each request.',
+          ['--quiet-server'],
+          {'action': 'store_true', 'default': False}),
+         ))
+
+
+class Metrics(object):
+
+    """Latency and throughput of the recent requests."""
+
+    def __init__(self, window=1000):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.inflight = 0
+        self.latencies = deque(maxlen=window)
+        self.conversions = deque(maxlen=window)
+        self.finished = deque(maxlen=window)
+
+    def begin(self):
+        with self.lock:
+            self.inflight += 1
+
+    def end(self, latency, conversion, ok):
+        with self.lock:
+            self.inflight -= 1
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            self.latencies.append(latency)
+            if conversion is not None:
+                self.conversions.append(conversion)
+            self.finished.append(time.time())
+
+    def snapshot(self):
+        with self.lock:
+            now = time.time()
+            latencies = sorted(self.latencies)
+            conversions = list(self.conversions)
+            recent = [t for t in self.finished if now - t <= 60.0]
+            result = {
+                'uptime': now - self.started,
+                'requests': self.requests,
+                'errors': self.errors,
+                'inflight': self.inflight,
+            }
+        period = min(60.0, result['uptime']) or 1.0
+        result['throughput'] = len(recent) / period
+        for name, p in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+            result['latency_' + name] = percentile(latencies, p)
+        result['latency_max'] = latencies and latencies[-1] or None
+        if conversions:
+            result['conversion_mean'] = sum(conversions) / len(conversions)
+        else:
+            result['conversion_mean'] = None
+        return result
+
+def percentile(sortedValues, p):
+    if not sortedValues:
+        return None
+    return sortedValues[min(len(sortedValues) - 1,
+                            int(p * len(sortedValues)))]
+
+
+def insideRoot(root, path):
+    """Return the real path of `path` if it is inside `root`, else None."""
+    path = os.path.realpath(os.path.join(root, path))
+    if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+        return path
+    return None
+
+
+def initServerWorker(settings):
+    rst2html_typo3.initBatchWorker(settings)
+    # load what the first conversion would load
+    rst2html_typo3.convertSource((u'Warm up\n', '<warm-up>', None))
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                          BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class ConversionHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def getSettings(self, options):
+        """Return the settings for the command line `options`."""
+        key = tuple(options)
+        settings = self.server.optionSettings.get(key)
+        if settings is None:
+            for option in options:
+                # the parser would already open files for some options
+                if (option.startswith('-')
+                        and option.split('=', 1)[0] not in ACCEPTED_OPTIONS):
+                    raise ValueError('Option not accepted: %s' % option)
+            settings, paths = rst2html_typo3.parseBatchCommandLine(
+                self.server.publisher, list(options))
+            if paths:
+                raise ValueError('No file arguments expected: %s'
+                                 % ' '.join(paths))
+            stylesheets = settings.stylesheet_path or []
+            if not isinstance(stylesheets, list):
+                stylesheets = stylesheets.split(',')
+            for stylesheet in stylesheets:
+                if insideRoot(self.server.root, stylesheet.strip()) is None:
+                    raise ValueError('Stylesheet outside of %s: %s'
+                                     % (self.server.root, stylesheet))
+            self.server.optionSettings[key] = settings
+        return settings
+
+    def resolvePath(self, path, directory):
+        """Return `path` as the worker should see it or None if outside.
+
+        Relative paths of a client in the root folder stay relative, so the
+        messages name the files like a conversion in process does.
+        """
+        root = self.server.root
+        if directory and os.path.realpath(directory) != root:
+            path = os.path.join(directory, path)
+        realPath = insideRoot(root, path)
+        if realPath is None or os.path.isabs(path):
+            return realPath
+        return path
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            self.sendJson(200, self.server.metrics.snapshot())
+        elif self.path == '/health':
+            self.sendJson(200, {'status': 'ok'})
+        else:
+            self.sendJson(404, {'error': 'Not found.'})
+
+    def do_POST(self):
+        if self.path != '/convert':
+            self.sendJson(404, {'error': 'Not found.'})
+            return
+        if self.headers.get('Origin'):
+            # browsers send it, local tools don't
+            self.sendJson(403, {'error': 'Requests from web pages are not '
+                                         'accepted.'})
+            return
+        contentType = self.headers.get('Content-Type') or ''
+        if contentType.split(';')[0].strip().lower() != 'application/json':
+            self.sendJson(415, {'error': 'Content-Type must be '
+                                         'application/json.'})
+            return
+        t0 = default_timer()
+        metrics = self.server.metrics
+        metrics.begin()
+        conversion = None
+        ok = False
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                request = json.loads(self.rfile.read(length).decode('utf-8'))
+                text = request.get('text')
+                path = request.get('path')
+                destination = request.get('destination')
+                options = request.get('options')
+                directory = request.get('directory')
+            except (ValueError, AttributeError):
+                self.sendJson(400, {'error': 'A JSON object is expected.'})
+                return
+            if text is None and not path:
+                self.sendJson(400, {'error': '"text" or "path" is needed.'})
+                return
+            root = self.server.root
+            settings = self.server.settings
+            if options is not None:
+                if (not directory
+                        or os.path.realpath(directory) != root):
+                    # relative paths in the options would be wrong
+                    self.sendJson(409, {'error': 'Options are only '
+                                                 'accepted from %s.' % root})
+                    return
+                try:
+                    settings = self.getSettings(options)
+                except (ValueError, TypeError) as e:
+                    self.sendJson(400, {'error': 'Bad options: %s' % e})
+                    return
+                except SystemExit:
+                    # optparse has written the reason to stderr
+                    self.sendJson(400, {'error': 'Bad options: %s'
+                                                 % ' '.join(options)})
+                    return
+            if text is None:
+                path = self.resolvePath(path, directory)
+                if path is None:
+                    self.sendJson(403, {'error': '"path" is outside of %s.'
+                                                 % root})
+                    return
+            else:
+                # the text comes from the client and must not read files
+                settings = copy.copy(settings)
+                settings.file_insertion_enabled = False
+                settings.raw_enabled = False
+            if destination:
+                destination = self.resolvePath(destination, directory)
+                if destination is None:
+                    self.sendJson(403, {'error': '"destination" is outside '
+                                                 'of %s.' % root})
+                    return
+            task = (text, path or '<string>', destination, settings)
+            try:
+                output, error, conversion = self.server.pool.apply(
+                    rst2html_typo3.convertSource, (task,))
+            except Exception as e:
+                # the task could not be handed to a worker
+                error = '%s: %s' % (e.__class__.__name__, e)
+            if error is not None:
+                self.sendJson(500, {'error': error})
+                return
+            ok = True
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=%s'
+                             % self.server.settings.output_encoding)
+            self.send_header('Content-Length', str(len(output)))
+            self.end_headers()
+            self.wfile.write(output)
+        finally:
+            metrics.end(default_timer() - t0, conversion, ok)
+
+    def sendJson(self, status, data):
+        body = json.dumps(data, indent=2, sort_keys=True).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.settings.quiet_server:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(
+                self, format, *args)
+
+
+def convertWithServer(sourcePath, destination, options=None, url=None,
+                      timeout=60):
+    """Let a running server convert a file. Return False if it didn't.
+
+    `options` are the command line options for ``rst2html_typo3.py``. The
+    server uses them instead of its own. `url` defaults to the environment
+    variable RST2HTML_SERVER or http://127.0.0.1:8765.
+    """
+    url = url or os.environ.get('RST2HTML_SERVER') or DEFAULT_URL
+    # relative paths are sent as they are, so messages look the same as
+    # with a conversion in process
+    request = {'path': sourcePath, 'destination': destination,
+               'directory': os.getcwd()}
+    if options is not None:
+        request['options'] = list(options)
+    data = json.dumps(request)
+    request = Request(url.rstrip('/') + '/convert', data.encode('utf-8'),
+                      {'Content-Type': 'application/json'})
+    try:
+        response = urlopen(request, timeout=timeout)
+        try:
+            response.read()
+        finally:
+            response.close()
+    except (IOError, OSError):
+        # no server, options or files it doesn't accept, or the
+        # conversion failed
+        return False
+    return True
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    pub = Publisher(rst2html_typo3.reader, rst2html_typo3.parser,
+                    rst2html_typo3.writer, None)
+    pub.set_components(rst2html_typo3.reader_name,
+                       rst2html_typo3.parser_name,
+                       rst2html_typo3.writer_name)
+    settings, paths = rst2html_typo3.parseBatchCommandLine(
+        pub, argv, ServerSettingsSpec())
+    if paths:
+        sys.stderr.write('No file arguments expected: %s\n'
+                         % ' '.join(paths))
+        return 2
+    root = os.path.realpath(settings.root or os.getcwd())
+    # relative paths of the requests and their options start at the root
+    os.chdir(root)
+    jobs = settings.jobs or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(jobs, initServerWorker, (settings,))
+    server = ThreadingHTTPServer((settings.host, settings.port),
+                                 ConversionHandler)
+    server.pool = pool
+    server.publisher = pub
+    server.settings = settings
+    server.optionSettings = {}
+    server.root = root
+    server.metrics = Metrics()
+    sys.stderr.write('Serving %s on http://%s:%s with %s workers\n'
+                     % (server.root, settings.host, settings.port, jobs))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.terminate()
+        pool.join()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
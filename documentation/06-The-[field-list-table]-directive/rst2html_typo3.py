@@ -9,6 +9,11 @@ A front end to the Docutils Publisher, producing HTML.
 
 ((extended functionality, TYPO3 ...))
 
+With ``--batch`` any number of files and folders can be given. All .rst
+files are converted to .html files in a pool of ``--jobs`` processes::
+
+   python rst2html_typo3.py --batch --jobs 4 --output-dir html docs
+
 """
 
 from __future__ import absolute_import
@@ -19,7 +24,14 @@ except:
     pass
 
 
+import copy
+import multiprocessing
+import os
+import sys
+from timeit import default_timer
+
 import docutils.core
+import docutils.io
 from docutils import nodes, SettingsSpec
 from docutils.core import publish_cmdline, default_usage
 from docutils.parsers.rst.directives import register_directive
@@ -27,7 +39,13 @@ from docutils.parsers.rst.directives import register_directive
 extraDirectives = []
 
 # additional directives:
-from fieldlisttable import FieldListTable
+try:
+    from sphinxcontrib.t3fieldlisttable import FieldListTable
+    oldFieldListTable = False
+except ImportError:
+    # the copy next to this script only knows --field-list-table-off
+    from fieldlisttable import FieldListTable
+    oldFieldListTable = True
 register_directive('field-list-table', FieldListTable)
 extraDirectives.append('field-list-table')
 
@@ -35,8 +53,24 @@ extraDirectives.append('field-list-table')
 # augmented and modified writer
 from docutils.writers.html4css1 import HTMLTranslator
 
+# Embedded stylesheets by path. Read only once per process.
+stylesheetCache = {}
+
 class MyHTMLTranslator(HTMLTranslator):
 
+    def stylesheet_call(self, path, *args, **kwargs):
+        if not self.settings.embed_stylesheet:
+            return HTMLTranslator.stylesheet_call(self, path, *args, **kwargs)
+        code = stylesheetCache.get(path)
+        if code is None:
+            code = HTMLTranslator.stylesheet_call(self, path, *args, **kwargs)
+            if not code.startswith('<--- '):
+                # not an error message
+                stylesheetCache[path] = code
+        else:
+            self.settings.record_dependencies.add(path)
+        return code
+
     def visit_title(self, node):
         HTMLTranslator.visit_title(self, node)
         if isinstance(node.parent, nodes.Admonition):
@@ -44,46 +78,71 @@ class MyHTMLTranslator(HTMLTranslator):
             extra = '<div class="layout-admonition-icon"></div>\n'
             self.context.append(close_tag + extra)
 
+    def visit_tgroup(self, node):
+        HTMLTranslator.visit_tgroup(self, node)
+        # start tags of the entries by (head, stub, align, morerows,
+        # morecols), for entries without ids and classes
+        node.entryTags = {}
+
+    def visit_row(self, node):
+        HTMLTranslator.visit_row(self, node)
+        tgroup = node.parent.parent
+        node.isHead = isinstance(node.parent, nodes.thead)
+        node.stubs = tgroup.stubs
+        node.entryTags = tgroup.entryTags
+
     def visit_entry(self, node):
-        atts = {}
-        atts['class'] = []
-        if isinstance(node.parent.parent, nodes.thead):
-            atts['class'].append('head')
-        if node.parent.parent.parent.stubs[node.parent.column]:
-            # "stubs" list is an attribute of the tgroup element
-            atts['class'].append('stub')
-        if atts['class']:
+        row = node.parent
+        attributes = node.attributes
+        stub = bool(row.stubs[row.column])
+        align = attributes.get('align')
+        morerows = attributes.get('morerows')
+        morecols = attributes.get('morecols')
+        plain = not attributes['ids'] and not attributes['classes']
+        if row.isHead or stub:
             tagname = 'th'
         else:
             tagname = 'td'
-        if 'align' in node:
-            surprise = False
-            for part in node['align'].split(' '):
-                # what we expect
-                if part in ['left', 'right', 'center',
-                            'justify', 'top', 'bottom',
-                            'middle']:
-                    pass
-                else:
-                    surprise = True
-            if 1 or not surprise:
-                atts['class'].extend(node['align'].split(' '))
-        if atts['class']:
-            atts['class'] = ' '.join(atts['class'])
-        else:
-            del atts['class']
-        node.parent.column += 1
-        if 'morerows' in node:
-            atts['rowspan'] = node['morerows'] + 1
-        if 'morecols' in node:
-            atts['colspan'] = node['morecols'] + 1
-            node.parent.column += node['morecols']
-        self.body.append(self.starttag(node, tagname, '', **atts))
-        self.context.append('</%s>\n' % tagname.lower())
+        row.column += 1
+        if morecols:
+            row.column += morecols
+        key = (row.isHead, stub, align, morerows, morecols)
+        tag = None
+        if plain:
+            tag = row.entryTags.get(key)
+        if tag is None:
+            atts = {}
+            classes = []
+            if row.isHead:
+                classes.append('head')
+            if stub:
+                classes.append('stub')
+            if align:
+                classes.extend(splitAlign(align))
+            if classes:
+                atts['class'] = ' '.join(classes)
+            if morerows is not None:
+                atts['rowspan'] = morerows + 1
+            if morecols is not None:
+                atts['colspan'] = morecols + 1
+            tag = self.starttag(node, tagname, '', **atts)
+            if plain:
+                row.entryTags[key] = tag
+        self.body.append(tag)
+        self.context.append('</%s>\n' % tagname)
         if len(node) == 0:              # empty cell
             self.body.append('&nbsp;')
         self.set_first_last(node)
 
+# Alignments like 'left top' split into classes
+alignClasses = {}
+
+def splitAlign(align):
+    result = alignClasses.get(align)
+    if result is None:
+        result = alignClasses[align] = align.split(' ')
+    return result
+
 myWriter = docutils.writers.html4css1.Writer()
 myWriter.translator_class = MyHTMLTranslator
 
@@ -111,12 +170,64 @@ class MySettingsSpec(SettingsSpec):
           'the transformation is omitted.',
           ['--field-list-table-off'],
           {'action': 'store_true','default':False}),
+         ('Measure the time spent in each phase of the field-list-table '
+          'directive.',
+          ['--field-list-table-instrument'],
+          {'action': 'store_true','default':False}),
+         ('Warn about field-list-tables that take longer than this many '
+          'seconds to process. Requires --field-list-table-instrument. '
+          'Default: 1.0',
+          ['--field-list-table-time-budget'],
+          {'metavar': '<seconds>', 'type': 'float', 'default': None}),
+         ('How field-list-tables are built: "classic" (several passes) or '
+          '"fused" (a single pass over the list) or "streaming" (a single '
+          'pass that frees each source row once it is built). '
+          'Default: classic',
+          ['--field-list-table-engine'],
+          {'metavar': '<engine>', 'type': 'choice',
+           'choices': ['classic', 'fused', 'streaming'], 'default': None}),
+         ('Check field-list-tables on their raw lines before the cells '
+          'are parsed.',
+          ['--field-list-table-prescan'],
+          {'action': 'store_true', 'dest': 'field_list_table_prescan',
+           'default': None}),
+         ('Parse the cells of field-list-tables one by one and remember '
+          'this many parsed cell bodies for cells with the same text. '
+          'Default: 0 (off)',
+          ['--field-list-table-cell-cache-size'],
+          {'metavar': '<number>', 'type': 'int', 'default': None}),
+         ('Only check field-list-tables for errors and leave them out of '
+          'the output.',
+          ['--field-list-table-validate'],
+          {'action': 'store_true', 'default': None}),
+         ('Report all errors of a field-list-table at once instead of '
+          'stopping at the first one.',
+          ['--field-list-table-collect-errors'],
+          {'action': 'store_true', 'default': None}),
+         ('Profile the field-list-table directive with cProfile and write '
+          'one <source name>.pstats file per document to this folder.',
+          ['--field-list-table-profile'],
+          {'metavar': '<folder>', 'default': None}),
+         ('Only profile every nth field-list-table. Default: 1',
+          ['--field-list-table-profile-sample'],
+          {'metavar': '<n>', 'type': 'int', 'default': None}),
+         ('Convert all files and folders given as arguments instead of '
+          'one source and destination. Each .rst file becomes a .rst.html '
+          'file.',
+          ['--batch'],
+          {'action': 'store_true', 'default': False}),
+         ('Number of processes for --batch. Default: number of CPUs',
+          ['--jobs'],
+          {'metavar': '<number>', 'type': 'int', 'default': 0}),
+         ('Folder for the output files of --batch. Default: next to the '
+          'source files',
+          ['--output-dir'],
+          {'metavar': '<folder>', 'default': None}),
          ))
 settings_spec = MySettingsSpec()
 
 
 if 0 and 'developing':
-    import sys
     if len(sys.argv) == 1:
         sys.argv = sys.argv[:1]
         # sys.argv += ['--help']
@@ -163,23 +274,190 @@ argv = None
 usage = default_usage
 description = default_description
 
-pub = Publisher(reader, parser, writer, settings)
-pub.set_components(reader_name, parser_name, writer_name)
 
-if pub.settings is None:
-    pub.process_command_line(
+def unsupportedOptions(settings):
+    """Return the options that the old fieldlisttable.py would ignore."""
+    if not oldFieldListTable:
+        return []
+    return ['--' + name.replace('_', '-')
+            for name, value in sorted(vars(settings).items())
+            if name.startswith('field_list_table_')
+            and name != 'field_list_table_off' and value]
+
+unsupportedMessage = ('sphinxcontrib.t3fieldlisttable is not installed and '
+                      'the old fieldlisttable.py does not support: %s')
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    pub = Publisher(reader, parser, writer, settings)
+    pub.set_components(reader_name, parser_name, writer_name)
+    if '--batch' in argv:
+        return batch(pub, argv)
+
+    if pub.settings is None:
+        pub.process_command_line(
+            argv,
+            usage,
+            description,
+            settings_spec,
+            config_section,
+            **(settings_overrides or {}))
+    unsupported = unsupportedOptions(pub.settings)
+    if unsupported:
+        sys.stderr.write(unsupportedMessage % ', '.join(unsupported) + '\n')
+        return 2
+
+    pub.publish(
         argv,
         usage,
         description,
         settings_spec,
+        settings_overrides,
         config_section,
-        **(settings_overrides or {}))
-
-output = pub.publish(
-    argv,
-    usage,
-    description,
-    settings_spec,
-    settings_overrides,
-    config_section,
-    enable_exit_status)
+        enable_exit_status)
+    return 0
+
+
+# batch mode
+
+batchSettings = None
+batchPublisher = None
+
+def parseBatchCommandLine(pub, argv, spec=None):
+    """Return the settings and the list of files and folders."""
+    setupParser = (getattr(pub, 'setup_option_parser', None)
+                   or pub._setup_settings_parser)
+    optionParser = setupParser(usage, description, spec or settings_spec,
+                               config_section, **(settings_overrides or {}))
+    paths = []
+    def checkArgs(args):
+        paths.extend(args)
+        del args[:]
+        return None, None
+    optionParser.check_args = checkArgs
+    settings = optionParser.parse_args(argv)
+    unsupported = unsupportedOptions(settings)
+    if unsupported:
+        optionParser.error(unsupportedMessage % ', '.join(unsupported))
+    return settings, paths
+
+def findBatchTasks(paths, outputDir):
+    """Return `(size, source, destination)` for each file to convert."""
+    tasks = []
+    for path in paths:
+        if os.path.isdir(path):
+            sources = []
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+                sources.extend([os.path.normpath(os.path.join(dirpath, f))
+                                for f in filenames if f.endswith('.rst')])
+            base = path
+        else:
+            sources = [path]
+            base = os.path.dirname(path)
+        for source in sources:
+            if outputDir:
+                destination = os.path.join(
+                    outputDir, os.path.relpath(source, base) + '.html')
+            else:
+                destination = source + '.html'
+            tasks.append((os.path.getsize(source), source, destination))
+    # the largest files first, so no process is left with a big one at
+    # the end
+    tasks.sort(key=lambda task: -task[0])
+    return tasks
+
+def initBatchWorker(settings):
+    """Prepare a process to convert files with `settings`."""
+    global batchSettings, batchPublisher
+    batchSettings = settings
+    batchPublisher = Publisher(reader, parser, writer, settings)
+    batchPublisher.set_components(reader_name, parser_name, writer_name)
+
+def convertFile(task):
+    """Convert one file. Return `(source, error, seconds)`."""
+    size, source, destination = task
+    t0 = default_timer()
+    settings = copy.copy(batchSettings)
+    settings._source = source
+    settings._destination = destination
+    pub = batchPublisher
+    pub.settings = settings
+    pub.source = pub.destination = None
+    error = None
+    try:
+        folder = os.path.dirname(destination)
+        if folder and not os.path.isdir(folder):
+            try:
+                os.makedirs(folder)
+            except OSError:
+                # made by another process in the meantime
+                pass
+        pub.set_io()
+        pub.publish(enable_exit_status=False)
+    except (Exception, SystemExit) as e:
+        error = '%s: %s' % (e.__class__.__name__, e)
+    return source, error, default_timer() - t0
+
+def convertSource(task):
+    """Convert reST `text` or, if `text` is None, the file `sourcePath`.
+
+    Return `(output, error, seconds)`. The output is written to
+    `destination` as well if that is given. A fourth item of `task`
+    replaces the settings of the worker.
+    """
+    text, sourcePath, destination = task[:3]
+    t0 = default_timer()
+    settings = copy.copy(task[3] if len(task) > 3 else batchSettings)
+    settings._source = sourcePath
+    settings._destination = destination
+    if hasattr(settings, 'output_path'):
+        # newer docutils
+        settings.output_path = destination
+    pub = batchPublisher
+    pub.settings = settings
+    pub.source = None
+    output = error = None
+    try:
+        if text is not None:
+            pub.source = docutils.io.StringInput(source=text,
+                                                 source_path=sourcePath)
+        pub.destination = docutils.io.StringOutput(
+            encoding=settings.output_encoding,
+            error_handler=settings.output_encoding_error_handler)
+        output = pub.publish(enable_exit_status=False)
+        if destination:
+            with open(destination, 'wb') as f:
+                f.write(output)
+    except (Exception, SystemExit) as e:
+        error = '%s: %s' % (e.__class__.__name__, e)
+    return output, error, default_timer() - t0
+
+def batch(pub, argv):
+    argv = [arg for arg in argv if arg != '--batch']
+    settings, paths = parseBatchCommandLine(pub, argv)
+    tasks = findBatchTasks(paths, settings.output_dir)
+    jobs = settings.jobs or multiprocessing.cpu_count()
+    if jobs > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(jobs, initBatchWorker, (settings,))
+        try:
+            results = list(pool.imap_unordered(convertFile, tasks))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        initBatchWorker(settings)
+        results = [convertFile(task) for task in tasks]
+    errors = 0
+    for source, error, seconds in sorted(results):
+        if error is None:
+            sys.stderr.write('%8.3fs  %s\n' % (seconds, source))
+        else:
+            errors += 1
+            sys.stderr.write('  FAILED  %s: %s\n' % (source, error))
+    return errors and 1 or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
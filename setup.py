@@ -68,4 +68,16 @@ setup(
     # https://packaging.python.org/en/latest/technical.html#install-requires-vs-requirements-files
     install_requires=['sphinx'],
 
+    # YAML data files for the :file: option
+    extras_require={
+        'yaml': ['PyYAML'],
+    },
+
+    # Check the tables of a documentation tree without a Sphinx build.
+    entry_points={
+        'console_scripts': [
+            't3fieldlisttable-lint=sphinxcontrib.t3fieldlisttable_lint:main',
+        ],
+    },
+
 )
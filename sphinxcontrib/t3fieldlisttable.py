@@ -37,25 +37,560 @@ Directive for field-list-table elements.
 """
 
 from __future__ import absolute_import
+import six
 from six.moves import range
 __docformat__ = 'reStructuredText'
 
+import cProfile
+import csv
+import hashlib
+import io
+import itertools
+import json
+import os
+import re
 import sys
+from collections import OrderedDict, namedtuple
+from timeit import default_timer
 
+from docutils import utils
 from docutils.utils import SystemMessagePropagation
+from docutils.statemachine import StringList, string2lines
 from docutils.parsers.rst import directives
 from docutils import nodes
 from docutils.parsers.rst.directives.tables import Table
+from docutils.transforms import Transform
 from docutils import DataError
 
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2
+    tracemalloc = None
+
 COMMENT_DRAWING_CHARS = '-=_~.*`\'"+'
 
+# If the source of a field name starts with none of these it cannot be a
+# comment, whatever inline markup it contains.
+COMMENT_CANDIDATE_CHARS = COMMENT_DRAWING_CHARS + '\\|['
+
+# Directives that change how the rest of a document is parsed. Documents
+# that use them don't use the table cache.
+PARSER_STATE_RE = re.compile(
+    r'^\s*\.\.\s+(default-role|role|default-domain)::', re.MULTILINE)
+
+# Nodes whose creation registers something in the document. Tables that
+# contain them are never taken from the table cache.
+UNCACHEABLE_NODES = (nodes.system_message, nodes.pending, nodes.target,
+                     nodes.footnote, nodes.footnote_reference,
+                     nodes.citation, nodes.citation_reference,
+                     nodes.substitution_definition,
+                     nodes.substitution_reference)
+
+# A field name is 'columnId[,colwidth[,align[,more...]]]'
+FIELDNAME_RE = re.compile(r"""
+    \s*(?P<columnIdRaw>[^,]*?)\s*
+    (?:,\s*(?P<colwidth>[^,]*?)\s*
+        (?:,\s*(?P<align>[^,]*?)\s*
+            (?:,(?P<more>.*))?
+        )?
+    )?\Z""", re.VERBOSE | re.UNICODE | re.DOTALL)
+
+# Used by the prescan of the raw directive content. Field names that only
+# consist of these characters come out of the inline parser unchanged.
+BULLET_ITEM_RE = re.compile(r'([-*+]) +(?=:)')
+FIELD_MARKER_RE = re.compile(r':(?! )([^:\\]+?)(?<! ):( +|$)')
+PLAIN_FIELDNAME_RE = re.compile(r"""(?:[^\W_]|[ ,.()=~+'"-])+\Z""",
+                                re.UNICODE)
+
+H_ALIGNMENTS = ('left', 'right', 'center', 'justify')
+V_ALIGNMENTS = ('top', 'bottom', 'middle')
+
+# The parsed field names and alignments are shared by all tables of a
+# build as the same names occur again and again.
+PARSE_CACHE_SIZE = 4096
+
+FieldName = namedtuple('FieldName', [
+    'columnIdRaw',      # 'a', '(a)', 'a..b', '(a..b)'
+    'colwidth',         # None or the string found
+    'align',            # None, the canonical alignment or the raw value
+    'alignIsValid',
+    'hAlign',           # tuple with 0 or 1 canonical horizontal alignment
+    'vAlign',           # tuple with 0 or 1 canonical vertical alignment
+    'more',             # None or tuple of the remaining parts
+    'isRowspan',        # columnIdRaw is '(...)'
+    'isIllegal',        # columnIdRaw is '(...' without closing parenthesis
+    'columnIdRange',    # columnIdRaw without parentheses
+    'columnId',         # first column of the range
+    'endId',            # last column of the range
+    ])
+
 class FieldListTableError(DataError):
     pass
 
+class CellInfo(object):
+
+    """What we know about one cell of the table.
+
+    There is one CellInfo per row and column, even if the cell is part of
+    a colspan (`isInColspan`) or of a rowspan (`isFollowingRow`).
+    """
+
+    __slots__ = ('colNum', 'rowNum', 'columnId', 'columnIdRange',
+                 'columnIdRaw', 'fieldNameRaw', 'colwidth', 'align', 'more',
+                 'colspan', 'rowspan', 'isInColspan', 'isFollowingRow')
+
+    def __init__(self):
+        self.colNum = None
+        self.rowNum = None
+        self.columnId = None
+        self.columnIdRange = None
+        self.columnIdRaw = None
+        self.fieldNameRaw = None
+        self.colwidth = None
+        self.align = None
+        self.more = None
+        self.colspan = None
+        self.rowspan = None
+        self.isInColspan = False
+        self.isFollowingRow = False
+
+class PrescanNode(object):
+
+    """Takes the place of a docutils node in the prescan.
+
+    Only what the checks of the table need is there. The text of a
+    PrescanNode is `text` or, if that is None, its `rawsource`.
+    """
+
+    __slots__ = ('rawsource', 'children', 'text')
+
+    def __init__(self, rawsource='', children=(), text=None):
+        self.rawsource = rawsource
+        self.children = list(children)
+        self.text = text
+
+    def __len__(self):
+        return len(self.children)
+
+    def __getitem__(self, i):
+        return self.children[i]
+
+    def __iter__(self):
+        return iter(self.children)
+
+    def astext(self):
+        if self.text is None:
+            return self.rawsource
+        return self.text
+
+# The checks only look at whether a cell has a body
+EMPTY_BODY_OUTLINE = PrescanNode()
+BODY_OUTLINE = PrescanNode(children=[''])
+
+def outlineItem(listItem):
+    """Return what the checks of the table need of a bullet list item.
+
+    The field names are kept as PrescanNodes, the cell bodies are not kept
+    at all. An item that is not a single field list is returned as it is,
+    so `checkBulletList()` reports it.
+    """
+    if len(listItem) != 1 or not isinstance(listItem[0], nodes.field_list):
+        return listItem
+    fields = []
+    for field in listItem[0]:
+        fieldName = field[0]
+        if field[1].children:
+            body = BODY_OUTLINE
+        else:
+            body = EMPTY_BODY_OUTLINE
+        fields.append((PrescanNode(fieldName.rawsource,
+                                   text=fieldName.astext()), body))
+    return PrescanNode(children=[PrescanNode(children=fields)])
+
+class LRUCache(object):
+
+    """A small dictionary that forgets the least recently used items."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key, default=None):
+        try:
+            value = self.data.pop(key)
+        except KeyError:
+            return default
+        self.data[key] = value
+        return value
+
+    def put(self, key, value):
+        self.data.pop(key, None)
+        self.data[key] = value
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+class TableCache(LRUCache):
+
+    """The built tables in the Sphinx environment.
+
+    The values are `(docname, lineno, nodes)`. The entries of a purged
+    document are set aside and only come back if the document is read
+    again and has the same tables.
+    """
+
+    def __init__(self, maxsize):
+        LRUCache.__init__(self, maxsize)
+        self.purged = {}
+
+    def get(self, key, default=None):
+        value = LRUCache.get(self, key)
+        if value is None:
+            value = self.purged.pop(key, None)
+            if value is None:
+                return default
+            self.put(key, value)
+        return value
+
+    def purge(self, docname):
+        for key, value in list(self.data.items()):
+            if value[0] == docname:
+                self.purged[key] = self.data.pop(key)
+
+_alignmentCache = LRUCache(PARSE_CACHE_SIZE)
+_fieldNameCache = LRUCache(PARSE_CACHE_SIZE)
+
+# Parsed cell bodies by text, see `FieldListTable.parseCellBodies()`. Each
+# process of a parallel Sphinx build has its own.
+_cellBodyCache = LRUCache(0)
+
+def parseAlignment(v):
+    """Return `(canonical, hAlign, vAlign)` for an alignment spec.
+
+    `canonical` is False if `v` is not valid. `hAlign` and `vAlign` are
+    tuples of canonical names.
+    """
+    result = _alignmentCache.get(v)
+    if result is not None:
+        return result
+    hAlign = []
+    vAlign = []
+    for part in v.split(' '):
+        partLower = part.lower()
+        valid = False
+        for canonical in H_ALIGNMENTS:
+            if canonical.startswith(partLower):
+                valid = True
+                if not canonical in hAlign:
+                    hAlign.append(canonical)
+                break
+        if not valid:
+            for canonical in V_ALIGNMENTS:
+                if canonical.startswith(partLower):
+                    valid = True
+                    if not canonical in vAlign:
+                        vAlign.append(canonical)
+                    break
+    if not valid or len(hAlign)>1 or len(vAlign)>1:
+        canonical = False
+    else:
+        canonical = ' '.join(hAlign + vAlign)
+    result = (canonical, tuple(hAlign), tuple(vAlign))
+    _alignmentCache.put(v, result)
+    return result
+
+def parseFieldName(fieldNameRaw):
+    """Return the `FieldName` for the text of a field name."""
+    result = _fieldNameCache.get(fieldNameRaw)
+    if result is not None:
+        return result
+    match = FIELDNAME_RE.match(fieldNameRaw)
+    columnIdRaw, colwidth, align, more = match.group(
+        'columnIdRaw', 'colwidth', 'align', 'more')
+    colwidth = colwidth or None
+    alignIsValid = True
+    hAlign = vAlign = ()
+    if align:
+        canonical, hAlign, vAlign = parseAlignment(align)
+        if canonical:
+            align = canonical
+        else:
+            alignIsValid = False
+    else:
+        align = None
+    if more is not None:
+        more = tuple(more.split(','))
+    isRowspan = columnIdRaw.startswith('(')
+    isIllegal = isRowspan and not columnIdRaw.endswith(')')
+    if isRowspan:
+        columnIdRange = columnIdRaw[1:-1]
+    else:
+        columnIdRange = columnIdRaw
+    if '..' in columnIdRange:
+        columnId, endId = columnIdRange.split('..', 1)
+    else:
+        columnId = endId = columnIdRange
+    result = FieldName(columnIdRaw, colwidth, align, alignIsValid, hAlign,
+                       vAlign, more, isRowspan, isIllegal, columnIdRange,
+                       columnId, endId)
+    _fieldNameCache.put(fieldNameRaw, result)
+    return result
+
+def traverse(node, condition=None):
+    """Iterate over `node` and its descendants for any docutils version."""
+    findall = getattr(node, 'findall', None)
+    if findall is None:
+        return node.traverse(condition)
+    return findall(condition)
+
+def takeItems(bulletList):
+    """Yield the items of `bulletList` and drop each from the list.
+
+    Once the caller is done with an item nothing refers to it any more.
+    """
+    children = bulletList.children
+    children.reverse()
+    while children:
+        yield children.pop()
+
+class OutlinedItems(object):
+
+    """Iterate over list items and keep an outline of the ones taken.
+
+    The outlines are small, so the items themselves can go once their row
+    is built. `failed` tells if `items` itself raised FieldListTableError.
+    """
+
+    def __init__(self, items):
+        self.items = iter(items)
+        self.outlines = []
+        self.failed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            item = next(self.items)
+        except FieldListTableError:
+            self.failed = True
+            raise
+        self.outlines.append(outlineItem(item))
+        return item
+
+    next = __next__
+
+    def all(self):
+        """Return the outlines of the items taken so far and of the rest."""
+        return self.outlines + [outlineItem(item) for item in self.items]
+
 def yes_no_zero_one(argument):
     return directives.choice(argument, ('yes', 'no', '0', '1'))
 
+def yes_no_zero_one_validate(argument):
+    return directives.choice(argument, ('yes', 'no', '0', '1', 'validate'))
+
+def readJsonLinesRows(f):
+    """Yield `(lineNumber, row)` for each line of a JSON Lines file."""
+    for lineNumber, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line, object_pairs_hook=OrderedDict)
+        except ValueError as e:
+            raise FieldListTableError('Line %s of the data file: %s'
+                                      % (lineNumber, e))
+        yield lineNumber, row
+
+def readCsvRows(f):
+    """Yield `(lineNumber, row)` for each record of a CSV file.
+
+    A record holds field names and field bodies in turn.
+    """
+    if six.PY2:
+        reader = csv.reader(line.encode('utf-8') for line in f)
+    else:
+        reader = csv.reader(f)
+    lineNumber = 1
+    for record in reader:
+        if six.PY2:
+            record = [value.decode('utf-8') for value in record]
+        if any(record):
+            yield lineNumber, [record[i:i + 2]
+                               for i in range(0, len(record), 2)
+                               if record[i]]
+        lineNumber = reader.line_num + 1
+
+def readYamlRows(f):
+    """Yield `(lineNumber, row)` for each row of a YAML file.
+
+    A document is either one row or a list of rows.
+    """
+    try:
+        import yaml
+    except ImportError:
+        raise FieldListTableError('PyYAML is needed to read YAML files.')
+    loader = yaml.SafeLoader(f)
+    try:
+        while loader.check_node():
+            document = loader.get_node()
+            if isinstance(document, yaml.SequenceNode):
+                for node in document.value:
+                    yield (node.start_mark.line + 1,
+                           loader.construct_object(node, deep=True))
+            else:
+                yield (document.start_mark.line + 1,
+                       loader.construct_document(document))
+    except yaml.YAMLError as e:
+        raise FieldListTableError('Bad YAML data file: %s' % e)
+    finally:
+        loader.dispose()
+
+DATA_FILE_READERS = {
+    '.jsonl': readJsonLinesRows,
+    '.ndjson': readJsonLinesRows,
+    '.csv': readCsvRows,
+    '.yaml': readYamlRows,
+    '.yml': readYamlRows,
+}
+
+def getRowFields(row, lineNumber):
+    """Return the fields of a data file row as `(name, body)` pairs.
+
+    A row is a mapping of field names to bodies or a list of
+    `[name, body]` pairs. The body is None for fields without one.
+    """
+    if isinstance(row, dict):
+        pairs = list(row.items())
+    elif isinstance(row, list):
+        pairs = row
+    else:
+        pairs = None
+    fields = []
+    for pair in pairs or ():
+        if not isinstance(pair, (list, tuple)) or not 1 <= len(pair) <= 2:
+            pairs = None
+            break
+        body = None
+        if len(pair) == 2 and pair[1] is not None:
+            body = six.text_type(pair[1])
+            if not body.strip():
+                body = None
+        fields.append((six.text_type(pair[0]), body))
+    if pairs is None:
+        raise FieldListTableError(
+            'Row at line %s of the data file is neither a mapping nor a '
+            'list of [name, body] pairs.' % lineNumber)
+    return fields
+
+# [start, highest peak] of the tables being measured. Tables can be
+# nested in cells, and tracemalloc has only one peak.
+_memoryStack = []
+
+def startMemoryTrace():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    current, peak = tracemalloc.get_traced_memory()
+    if _memoryStack:
+        _memoryStack[-1][1] = max(_memoryStack[-1][1], peak)
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    _memoryStack.append([current, current])
+
+def stopMemoryTrace():
+    """Return the peak and the retained bytes since the start.
+
+    The peak is None before Python 3.9, where it cannot be reset.
+    """
+    current, peak = tracemalloc.get_traced_memory()
+    start, highest = _memoryStack.pop()
+    peak = max(peak, highest)
+    if _memoryStack:
+        _memoryStack[-1][1] = max(_memoryStack[-1][1], peak)
+    if not hasattr(tracemalloc, 'reset_peak'):
+        return None, current - start
+    return peak - start, current - start
+
+def getTableSize(result):
+    """Return the number of rows and columns of the tables in `result`."""
+    rows = columns = 0
+    for node in result:
+        if isinstance(node, compact_table):
+            rows += len(node['rowlengths'])
+            columns = max(columns, len(node['colspecs']))
+        elif isinstance(node, nodes.table):
+            for tgroup in node.children:
+                if isinstance(tgroup, nodes.tgroup):
+                    columns = max(columns, tgroup['cols'])
+                    rows += len(list(traverse(tgroup, nodes.row)))
+    return rows, columns
+
+# Seconds spent in nested tables, one value per table being run
+_nestedSeconds = []
+
+# (document, cProfile.Profile) by id of the document, the profile being
+# enabled while a table runs, and the number of tables seen for sampling
+_profiles = {}
+_activeProfiles = []
+_profileCount = itertools.count()
+
+def dumpTableProfile(document, path):
+    """Write the profile of the tables of `document` to `path`."""
+    entry = _profiles.pop(id(document), None)
+    if entry is None or entry[0] is not document:
+        return
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    entry[1].dump_stats(path)
+
+class WriteTableProfile(Transform):
+
+    """Write the profile of the tables of a document, without Sphinx."""
+
+    default_priority = 990
+
+    def apply(self, **kwargs):
+        settings = self.document.settings
+        filename = os.path.basename(self.document.get('source') or
+                                    'stdin') + '.pstats'
+        dumpTableProfile(self.document, os.path.join(
+            settings.field_list_table_profile, filename))
+
+def getTableCounts(result):
+    """Return tables, rows, cells and spans of the tables in `result`.
+
+    Tables nested in cells are not counted, they have records of their
+    own.
+    """
+    counts = {'tables': 0, 'rows': 0, 'cells': 0, 'spans': 0}
+    for node in result:
+        if isinstance(node, compact_table):
+            entries = [child for child in node.children
+                       if isinstance(child, nodes.entry)]
+            counts['rows'] += len(node['rowlengths'])
+        elif isinstance(node, nodes.table):
+            entries = []
+            for tgroup in node.children:
+                if not isinstance(tgroup, nodes.tgroup):
+                    continue
+                for part in tgroup.children:
+                    if isinstance(part, (nodes.thead, nodes.tbody)):
+                        counts['rows'] += len(part.children)
+                        for row in part.children:
+                            entries.extend(row.children)
+        else:
+            continue
+        counts['tables'] += 1
+        counts['cells'] += len(entries)
+        for entry in entries:
+            if 'morerows' in entry or 'morecols' in entry:
+                counts['spans'] += 1
+    return counts
+
 class FieldListTable(Table):
 
     """
@@ -75,36 +610,131 @@ class FieldListTable(Table):
         'stub-columns'   : directives.nonnegative_int,
         'total-width'    : directives.nonnegative_int,
         'debug-cellinfo' : yes_no_zero_one,
-        'transformation' : yes_no_zero_one,
+        'transformation' : yes_no_zero_one_validate,
+        'max-rows-per-table' : directives.nonnegative_int,
+        'file'           : directives.path,
     }
 
 
     def run(self):
+        profile = self.getProfile()
+        if profile is None:
+            return self.runCounted()
+        _activeProfiles.append(profile)
+        profile.enable()
+        try:
+            return self.runCounted()
+        finally:
+            profile.disable()
+            _activeProfiles.pop()
+
+    def runCounted(self):
+        stats = self.getStatsRecords()
+        if stats is None:
+            return self.runMeasured()
+        _nestedSeconds.append(0.0)
+        try:
+            result = self.runMeasured()
+        finally:
+            nested = _nestedSeconds.pop()
+        if _nestedSeconds:
+            _nestedSeconds[-1] += self.elapsed
+        record = getTableCounts(result)
+        record.update({
+            'document': self.getDocumentName(),
+            'line': self.lineno,
+            'seconds': self.elapsed - nested,
+        })
+        stats.append(record)
+        return result
+
+    def runMeasured(self):
+        records = self.getMemoryRecords()
+        if records is None:
+            return self.runDirective()
+        startMemoryTrace()
+        try:
+            result = self.runDirective()
+        finally:
+            peak, retained = stopMemoryTrace()
+        rows, columns = getTableSize(result)
+        records.append({
+            'document': self.getDocumentName(),
+            'line': self.lineno,
+            'rows': rows,
+            'columns': columns,
+            'peak': peak,
+            'retained': retained,
+        })
+        return result
+
+    def runDirective(self):
         self.errorstr = None
         self.cropped = None
-        self.colNum = None
-        self.rowNum = None
-        self.columnIds = []
-        self.columnIdsIndexes = {}
-        self.tableData = []
-        self.tableInfo = []
+        if self.getSetting('collect_errors', False):
+            self.errors = []
+        else:
+            self.errors = None
+        self.resetTableState()
+        self.counters = {'cells': 0, 'spans': 0, 'astext': 0, 'nodes': 0}
+        if self.getSetting('instrument', False):
+            self.timings = []
+        else:
+            self.timings = None
+        t0 = default_timer()
+        cache, cacheKey = self.getTableCache()
+        if cache is not None:
+            cached = cache.get(cacheKey)
+            if cached is not None:
+                result = self.restoreCachedResult(cached)
+                self.elapsed = default_timer() - t0
+                return result
         try:
             result = self.run2()
         except FieldListTableError as errorargs:
             self.errorstr = str(errorargs)
         if not self.errorstr is None:
-            error = self.errormsg(self.errorstr)
+            if self.errors:
+                error = self.errorReport(self.errorstr)
+            else:
+                error = self.errormsg(self.errorstr)
             result = [error]
+        self.elapsed = default_timer() - t0
+        if self.timings is not None:
+            warning = self.checkTimeBudget()
+            if warning is not None:
+                result = result + [warning]
+        if cache is not None and self.isCacheable(result):
+            env = self.state.document.settings.env
+            cache.put(cacheKey, (env.docname, self.lineno,
+                                 self.copyForCache(result)))
         return result
 
 
+    def resetTableState(self):
+        self.colNum = None
+        self.rowNum = None
+        self.columnIds = []
+        self.columnIdsIndexes = {}
+        self.tableData = []
+        self.tableInfo = []
+        # becomes True with the first cell that continues a rowspan
+        self.hasRowspans = False
+        # collected errors: row number -> columns of the failed fields
+        self.failedFields = {}
+
     def run2(self):
-        if not self.content:
+        dataFile = None
+        if 'file' in self.options:
+            if self.content:
+                msg = ('The directive has content and the "file" option. '
+                       'Only one of them is allowed.')
+                raise FieldListTableError(msg)
+            dataFile = self.getDataFile()
+        elif not self.content:
             msg = 'The directive is empty - content is required.'
             raise FieldListTableError(msg)
         title, messages = self.make_title()
-        self.node = nodes.Element()
-        self.state.nested_parse(self.content, self.content_offset, self.node)
         field_list_table_off = False
         if hasattr(self.state_machine.document.settings,
                    'field_list_table_off'):
@@ -112,46 +742,622 @@ class FieldListTable(Table):
                 self.state_machine.document.settings.field_list_table_off
         if self.options.get('transformation') in ['no', '0']:
             field_list_table_off = True
+        validateOnly = (self.options.get('transformation') == 'validate'
+                        or self.getSetting('validate', False))
+        if self.options.get('definition-row') in ['yes', '1']:
+            self.definitionRow = 1
+        else:
+            self.definitionRow = 0
+        headerRows = self.options.get('header-rows', 0)
+        stubColumns = self.options.get('stub-columns', 0)
+        prescan = self.getSetting('prescan', False)
+        cellCacheSize = self.getSetting('cell_cache_size', 0)
+        items = None
+        if (dataFile is None and not field_list_table_off
+                and (prescan or cellCacheSize)):
+            items = self.timed('scanContentLines', self.scanContentLines,
+                               self.content)
+        commentRows = ()
+        if items and prescan:
+            commentRows = self.timed('prescan', self.prescan, items,
+                                     headerRows, stubColumns)
+            if validateOnly:
+                return messages
+        engine = self.getSetting('engine', 'classic')
+        if self.options.get('debug-cellinfo') in ['yes', '1']:
+            engine = 'classic'
+        streaming = (engine == 'streaming' and not validateOnly
+                     and not field_list_table_off)
+        self.node = nodes.Element()
+        listItems = None
+        if streaming and dataFile is not None:
+            # the rows are read and parsed while the table is built
+            listItems = self.iterDataFileItems(dataFile, cellCacheSize)
+        elif streaming and items and cellCacheSize:
+            listItems = self.iterCellBodyItems(items, commentRows,
+                                               cellCacheSize)
+        else:
+            self.parseContent(dataFile, items, commentRows, cellCacheSize)
         if field_list_table_off:
             # transformation has been turned off by cmd line option
             # --field-list-table-off or by directive option
             # :transformation: no
             # So we skip the transformation process
             return self.node.children
-        if len(self.node) != 1:
-            msg =("Exactly one item (a bullet list) expected. "
-                  "%s items found instead." % len(self.node))
-            raise FieldListTableError(msg)
-        if not isinstance(self.node[0],nodes.bullet_list):
-            msg = ("Content type is wrong. Exactly one bullet list "
-                   "is expected.")
-            raise FieldListTableError(msg)
-        if self.options.get('definition-row') in ['yes', '1']:
-            self.definitionRow = 1
+        if listItems is None:
+            if len(self.node) != 1:
+                msg =("Exactly one item (a bullet list) expected. "
+                      "%s items found instead." % len(self.node))
+                raise FieldListTableError(msg)
+            if not isinstance(self.node[0],nodes.bullet_list):
+                msg = ("Content type is wrong. Exactly one bullet list "
+                       "is expected.")
+                raise FieldListTableError(msg)
+        if validateOnly:
+            self.timed('checkBulletList', self.checkBulletList, self.node[0])
+            self.checkTable(self.node[0], headerRows, stubColumns)
+            return messages
+        tableNode = None
+        if engine in ('fused', 'streaming'):
+            if listItems is None:
+                listItems = self.node[0]
+                if streaming:
+                    listItems = takeItems(listItems)
+            if streaming:
+                listItems = OutlinedItems(listItems)
+            try:
+                tableNode = self.timed('buildTableInOnePass',
+                                       self.buildTableInOnePass,
+                                       listItems, headerRows, stubColumns)
+            except FieldListTableError:
+                if streaming and listItems.failed:
+                    # the data file is broken, there is nothing to check
+                    raise
+                # Start again. The classic pipeline reports the error with
+                # the usual row and column context.
+                self.resetTableState()
+                if self.errors:
+                    del self.errors[:]
+                if streaming:
+                    # The rows that were used are gone, and parsing them
+                    # again would repeat messages and targets. Their
+                    # outlines are enough for the checks.
+                    bulletList = PrescanNode(children=listItems.all())
+                    self.timed('checkBulletList', self.checkBulletList,
+                               bulletList)
+                    self.checkTable(bulletList, headerRows, stubColumns)
+                    raise
+        if tableNode is None:
+            tableNode = self.buildTableClassic(headerRows, stubColumns)
+        tables = [tableNode]
+        maxRows = self.options.get('max-rows-per-table')
+        if maxRows:
+            tables = self.timed('splitTable', self.splitTable, tableNode,
+                                maxRows)
+        if self.useCompactNodes():
+            tables = [self.timed('compactTable', compactTable, tableNode)
+                      for tableNode in tables]
+        for tableNode in tables:
+            tableNode['classes'] += self.options.get('class', [])
+        self.add_name(tables[0])
+        if title:
+            tables[0].insert(0, title)
+        return tables + messages
+
+    def parseContent(self, dataFile, items, commentRows, cellCacheSize):
+        """Parse the rows of the table into a bullet list in `self.node`."""
+        if dataFile is not None:
+            self.timed('parseDataFile', self.parseDataFile, dataFile,
+                       cellCacheSize)
+        elif items and cellCacheSize:
+            self.timed('parseCellBodies', self.parseCellBodies, items,
+                       commentRows, cellCacheSize)
         else:
-            self.definitionRow = 0
-        bulletList = self.node[0]
-        self.checkBulletList(bulletList)
+            content = self.content
+            if commentRows:
+                content = self.blankCommentRows(items, commentRows)
+            self.timed('nested_parse', self.state.nested_parse,
+                       content, self.content_offset, self.node)
+
+    def buildTableClassic(self, headerRows, stubColumns):
+        """Build the table in several passes over the parsed content."""
+        self.timed('checkBulletList', self.checkBulletList, self.node[0])
+        self.node[0] = self.checkTable(self.node[0], headerRows, stubColumns)
+        tableNode = self.timed('buildTableFromFieldList',
+                               self.buildTableFromFieldList,
+                               headerRows, stubColumns)
+        return tableNode
+
+    def checkTable(self, bulletList, headerRows, stubColumns):
+        """Collect and check the table data of `bulletList`.
+
+        Return the bullet list without comments.
+        """
         if self.options.get('allow-comments', True):
-            self.node[0] = self.removeComments(bulletList=self.node[0])
-        bulletList = self.node[0]
-        self.processDefinitionRow(listItem=bulletList[0])
-        self.adjustColumnWidths()
-        self.checkAlignments()
+            bulletList = self.timed('removeComments', self.removeComments,
+                                    bulletList=bulletList)
+        self.timed('processDefinitionRow', self.processDefinitionRow,
+                   listItem=bulletList[0])
+        self.timed('adjustColumnWidths', self.adjustColumnWidths)
+        self.timed('checkAlignments', self.checkAlignments)
         self.checkMoreAttributes()
-        bulletList = self.node[0]
-        self.processDataRows(bulletList)
+        self.timed('processDataRows', self.processDataRows, bulletList)
         # go and process our data rows':
-        headerRows = self.options.get('header-rows', 0)
-        stubColumns = self.options.get('stub-columns', 0)
-        self.checkTableDimensions(self.tableData, headerRows, stubColumns)
-        self.checkRowspans()
-        tableNode = self.buildTableFromFieldList(headerRows, stubColumns)
-        tableNode['classes'] += self.options.get('class', [])
-        self.add_name(tableNode)
-        if title:
-            tableNode.insert(0, title)
-        return [tableNode] + messages
+        self.timed('checkTableDimensions', self.checkTableDimensions,
+                   self.tableData, headerRows, stubColumns)
+        self.timed('checkRowspans', self.checkRowspans)
+        if self.errors:
+            msg = "Errors found in the table: %s." % len(self.errors)
+            raise FieldListTableError(msg)
+        return bulletList
+
+    def prescan(self, items, headerRows, stubColumns):
+        """Check the table before the cell bodies are parsed.
+
+        `items` are the rows found by `scanContentLines()`. Their field
+        names are run through the usual checks, so a broken table fails
+        right away with the same error. Return the first lines of the rows
+        that are comments only, as a set.
+        """
+        bulletList = PrescanNode()
+        for first, last, fields in items:
+            fieldList = PrescanNode()
+            for field in fields:
+                name = field[0]
+                fieldBody = PrescanNode(children=field[1] and [name] or [])
+                fieldList.children.append(PrescanNode(
+                    children=[PrescanNode(name), fieldBody]))
+            bulletList.children.append(PrescanNode(children=[fieldList]))
+        commentRows = set()
+        if self.options.get('allow-comments', True):
+            for item, listItem in zip(items, bulletList):
+                if not self.withoutComments(listItem[0].children):
+                    commentRows.add(item[0])
+        timings = self.timings
+        self.timings = None
+        try:
+            self.checkTable(bulletList, headerRows, stubColumns)
+        finally:
+            self.timings = timings
+        self.resetTableState()
+        return commentRows
+
+    def blankCommentRows(self, items, commentRows):
+        """Return a copy of the content with blank lines for comment rows.
+
+        The line numbers of everything else stay the same.
+        """
+        content = StringList(list(self.content.data),
+                             items=list(self.content.items))
+        for first, last, fields in items:
+            if first in commentRows:
+                for i in range(first, last + 1):
+                    content.data[i] = ''
+        return content
+
+    def parseCellBodies(self, items, commentRows, maxsize):
+        """Build the bullet list from `items` parsing each cell on its own.
+
+        Cell bodies without interpreted text and explicit markup are
+        memoized by their text. Further cells with the same text get a
+        deep copy with source and line numbers of their own.
+        """
+        bulletList = nodes.bullet_list()
+        bulletList.extend(list(self.iterCellBodyItems(items, commentRows,
+                                                      maxsize)))
+        self.node += bulletList
+
+    def iterCellBodyItems(self, items, commentRows, maxsize):
+        """Yield the list item of each row, see `parseCellBodies()`."""
+        cache = _cellBodyCache
+        cache.maxsize = maxsize
+        context = self.getCellCacheContext()
+        for first, last, fields in items:
+            if first in commentRows:
+                continue
+            fieldList = nodes.field_list()
+            for name, hasBody, firstLine, lastLine, column in fields:
+                fieldBody = nodes.field_body()
+                if hasBody:
+                    block, offset = self.getCellBlock(firstLine, lastLine,
+                                                      column)
+                    self.parseCell(block, offset, fieldBody, cache, context)
+                fieldList += nodes.field('', nodes.field_name(name, name),
+                                         fieldBody)
+            yield nodes.list_item('', fieldList)
+        # like nested_parse(), leave the document without a position
+        self.state.document.note_source(None, None)
+
+    def parseCell(self, block, offset, fieldBody, cache=None, context=None):
+        """Parse the lines of one cell into `fieldBody`.
+
+        With a `cache`, bodies without interpreted text and explicit
+        markup are memoized by their text.
+        """
+        key = None
+        if cache is not None:
+            text = u'\n'.join(block.data)
+            if not '`' in text and not '\n..' in '\n' + text:
+                key = (text, context)
+        cached = key and cache.get(key)
+        if cached is None:
+            self.state.nested_parse(block, offset, fieldBody)
+            if key and self.isCacheable(fieldBody.children):
+                cache.put(key, (block.items[0][1],
+                                self.copyForCache(fieldBody.children)))
+            return
+        source, lineOffset = block.items[0]
+        delta = lineOffset - cached[0]
+        self.state.document.note_source(None, None)
+        for cachedNode in cached[1]:
+            node = cachedNode.deepcopy()
+            for child in traverse(node):
+                if getattr(child, 'line', None) and delta:
+                    child.line += delta
+                if getattr(child, 'source', None):
+                    child.source = source
+            fieldBody += node
+
+    def getDataFile(self):
+        """Return the path of the ``:file:`` option.
+
+        The document is made dependent on the file, so it is read again
+        when the file changes.
+        """
+        settings = self.state.document.settings
+        if not getattr(settings, 'file_insertion_enabled', True):
+            msg = ('The "file" option is not allowed: file access is '
+                   'disabled.')
+            raise FieldListTableError(msg)
+        env = getattr(settings, 'env', None)
+        if env is not None:
+            dummy, path = env.relfn2path(self.options['file'], env.docname)
+            env.note_dependency(path)
+            return path
+        sourceDir = os.path.dirname(
+            os.path.abspath(self.state.document.current_source))
+        path = os.path.normpath(os.path.join(sourceDir,
+                                             self.options['file']))
+        path = utils.relative_path(None, path)
+        settings.record_dependencies.add(path)
+        return path
+
+    def parseDataFile(self, path, cellCacheSize):
+        """Build the bullet list from the rows of a data file.
+
+        The rows are read one at a time. Only the cell bodies are parsed,
+        field names are taken as they are.
+        """
+        bulletList = nodes.bullet_list()
+        bulletList.extend(list(self.iterDataFileItems(path, cellCacheSize)))
+        self.node += bulletList
+
+    def iterDataFileItems(self, path, cellCacheSize):
+        """Yield the list item of each row of a data file."""
+        reader = DATA_FILE_READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            msg = ('Unknown type of data file "%s". Use one of: %s.'
+                   % (path, ', '.join(sorted(DATA_FILE_READERS))))
+            raise FieldListTableError(msg)
+        cache = None
+        if cellCacheSize:
+            cache = _cellBodyCache
+            cache.maxsize = cellCacheSize
+        context = self.getCellCacheContext()
+        settings = self.state.document.settings
+        encoding = getattr(settings, 'input_encoding', None) or 'utf-8-sig'
+        tabWidth = getattr(settings, 'tab_width', 8)
+        try:
+            f = io.open(path, encoding=encoding, newline='')
+        except (IOError, OSError) as e:
+            msg = 'Cannot read data file "%s": %s' % (path, e)
+            raise FieldListTableError(msg)
+        with f:
+            for lineNumber, row in reader(f):
+                fieldList = nodes.field_list()
+                for name, body in getRowFields(row, lineNumber):
+                    fieldBody = nodes.field_body()
+                    if body is not None:
+                        lines = string2lines(body, tabWidth,
+                                             convert_whitespace=True)
+                        items = [(path, lineNumber - 1)] * len(lines)
+                        block = StringList(lines, items=items)
+                        # The nodes get the data file as source. Messages
+                        # of the inline parser point to the directive.
+                        self.parseCell(block, self.lineno - 1,
+                                       fieldBody, cache, context)
+                    fieldList += nodes.field(
+                        '', nodes.field_name(name, name), fieldBody)
+                yield nodes.list_item('', fieldList)
+        self.state.document.note_source(None, None)
+
+    def getCellBlock(self, firstLine, lastLine, column):
+        """Return the lines of a field body and their input offset.
+
+        The lines are prepared like docutils does for a field body: the
+        text after the field marker, then the following lines without
+        their common indentation.
+        """
+        data = self.content.data[firstLine:lastLine + 1]
+        indent = None
+        for line in data[1:]:
+            stripped = line.lstrip()
+            if stripped:
+                lineIndent = len(line) - len(stripped)
+                if indent is None or lineIndent < indent:
+                    indent = lineIndent
+        data = [data[0][column:]] + [line[indent:] for line in data[1:]]
+        skip = 0
+        while not data[skip]:
+            skip += 1
+        block = StringList(data[skip:], items=self.content.items[
+            firstLine + skip:lastLine + 1])
+        return block, self.content_offset + firstLine + skip
+
+    def getCellCacheContext(self):
+        """Return the settings that influence how a cell is parsed."""
+        settings = self.state.document.settings
+        return tuple([getattr(settings, name, None) for name in (
+            'language_code', 'pep_references', 'rfc_references',
+            'character_level_inline_markup', 'trim_footnote_reference_space',
+            'file_insertion_enabled', 'raw_enabled')])
+
+    def scanContentLines(self, lines):
+        """Return the rows of a simple field-list-table source or None.
+
+        Each row is `(firstLine, lastLine, fields)` with `fields` a list
+        of `[fieldName, hasBody, firstLine, lastLine, bodyColumn]`. Items
+        start at column 0 with the same bullet and a field, further fields
+        start exactly below the first one and bodies are indented deeper.
+        None is returned for anything else, like markup in a field name.
+        """
+        items = []
+        bullet = None
+        item = None
+        field = None
+        textIndent = None
+        for i, line in enumerate(lines):
+            stripped = line.lstrip()
+            if not stripped:
+                continue
+            indent = len(line) - len(stripped)
+            if indent == 0:
+                match = BULLET_ITEM_RE.match(line)
+                if match is None or bullet not in (None, match.group(1)):
+                    return None
+                if item is not None and item[0] != item[1] and not item[3]:
+                    # docutils would strip the deeper indent of the
+                    # following lines
+                    return None
+                bullet = match.group(1)
+                textIndent = match.end()
+                item = [i, i, [], False]
+                items.append(item)
+                rest = line[textIndent:]
+            elif item is None or indent < textIndent:
+                return None
+            elif indent > textIndent:
+                field[1] = True
+                field[3] = i
+                item[1] = i
+                continue
+            else:
+                rest = stripped
+                item[3] = True
+            match = FIELD_MARKER_RE.match(rest)
+            if match is None or not PLAIN_FIELDNAME_RE.match(match.group(1)):
+                return None
+            field = [match.group(1), bool(rest[match.end():]), i, i,
+                     len(line) - len(rest) + match.end()]
+            item[2].append(field)
+            item[1] = i
+        if item is not None and item[0] != item[1] and not item[3]:
+            return None
+        return [tuple(item[:3]) for item in items]
+
+    def getSetting(self, name, default=None):
+        """Return a setting of the field-list-table directive.
+
+        Docutils settings are named ``field_list_table_<name>`` (see
+        ``rst2html_typo3.py``), Sphinx config values are named
+        ``t3fieldlisttable_<name>``.
+        """
+        settings = self.state.document.settings
+        value = getattr(settings, 'field_list_table_' + name, None)
+        if value is not None:
+            return value
+        env = getattr(settings, 'env', None)
+        if env is not None:
+            return getattr(env.config, 't3fieldlisttable_' + name, default)
+        return default
+
+    def useCompactNodes(self):
+        """Return True if the tables are returned as `compact_table`.
+
+        Only in Sphinx builds, where ``setup()`` registered the visitors
+        and the transform for the node.
+        """
+        env = getattr(self.state.document.settings, 'env', None)
+        return env is not None and bool(self.getSetting('compact_nodes',
+                                                        False))
+
+    def getMemoryRecords(self):
+        """Return the list for the memory records of the tables or None.
+
+        Only in Sphinx builds with ``t3fieldlisttable_memory_report`` set.
+        """
+        env = getattr(self.state.document.settings, 'env', None)
+        if (env is None or tracemalloc is None
+                or not self.getSetting('memory_report', '')):
+            return None
+        records = getattr(env, 't3fieldlisttable_memory', None)
+        if records is None:
+            records = env.t3fieldlisttable_memory = []
+        return records
+
+    def getStatsRecords(self):
+        """Return the list for the statistics of the tables or None.
+
+        Only in Sphinx builds with ``t3fieldlisttable_stats_report`` set.
+        """
+        env = getattr(self.state.document.settings, 'env', None)
+        if env is None or not self.getSetting('stats_report', ''):
+            return None
+        records = getattr(env, 't3fieldlisttable_stats', None)
+        if records is None:
+            records = env.t3fieldlisttable_stats = []
+        return records
+
+    def getProfile(self):
+        """Return the cProfile.Profile to run this table with or None.
+
+        With ``t3fieldlisttable_profile`` set, the runs of all tables of a
+        document go into one profile, or only every nth run with
+        ``t3fieldlisttable_profile_sample``. Tables nested in a table
+        being profiled are part of that profile.
+        """
+        if not self.getSetting('profile', '') or _activeProfiles:
+            return None
+        sample = self.getSetting('profile_sample', 1)
+        if sample > 1 and next(_profileCount) % sample:
+            return None
+        document = self.state.document
+        entry = _profiles.get(id(document))
+        if entry is None or entry[0] is not document:
+            entry = _profiles[id(document)] = (document, cProfile.Profile())
+            if getattr(document.settings, 'env', None) is None:
+                # Sphinx builds write it on 'doctree-read'
+                document.transformer.add_transform(WriteTableProfile)
+        return entry[1]
+
+    def getDocumentName(self):
+        env = getattr(self.state.document.settings, 'env', None)
+        if env is not None:
+            return env.docname
+        return self.state.document.get('source', '')
+
+    def timed(self, phase, func, *args, **kwargs):
+        """Call `func` and record its duration if instrumentation is on."""
+        if self.timings is None:
+            return func(*args, **kwargs)
+        t0 = default_timer()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.timings.append((phase, default_timer() - t0))
+
+    def checkTimeBudget(self):
+        """Return a warning if the table took longer than the budget."""
+        budget = self.getSetting('time_budget', 1.0)
+        if not budget or self.elapsed <= budget:
+            return None
+        phases = ', '.join(['%s=%.3fs' % (phase, seconds)
+                            for phase, seconds in self.timings])
+        counters = ', '.join(['%s=%s' % (k, self.counters[k])
+                              for k in sorted(self.counters)])
+        msg = ('Slow %s in document "%s" at line %s: %.3fs exceeds the '
+               'time budget of %.3fs. Phases: %s. Counters: %s.' % (
+                   self.name, self.getDocumentName(), self.lineno,
+                   self.elapsed, budget, phases, counters))
+        return self.state_machine.reporter.warning(msg, line=self.lineno)
+
+    def getTableCache(self):
+        """Return the table cache of the Sphinx environment and our key.
+
+        The cache maps a hash of the directive source, its options and the
+        relevant settings to the resulting nodes. It only exists in Sphinx
+        builds with ``t3fieldlisttable_cache_size`` greater than 0.
+        """
+        env = getattr(self.state.document.settings, 'env', None)
+        if env is None:
+            return None, None
+        maxsize = self.getSetting('cache_size', 0)
+        if not maxsize or 'name' in self.options or 'file' in self.options:
+            return None, None
+        for line in self.content:
+            if line.lstrip().startswith('..'):
+                # nested directives, comments and targets may have side
+                # effects we cannot replay
+                return None, None
+        if self.changesParserState():
+            return None, None
+        cache = getattr(env, 't3fieldlisttable_cache', None)
+        if not isinstance(cache, TableCache):
+            cache = env.t3fieldlisttable_cache = TableCache(maxsize)
+        cache.maxsize = maxsize
+        parts = [self.name, env.docname, self.block_text,
+                 repr(sorted(self.options.items())),
+                 repr(sorted(env.ref_context.items())),
+                 repr(getattr(env.config, 'default_role', None)),
+                 repr(self.getCacheSettings())]
+        key = hashlib.sha1(
+            u'\x00'.join(parts).encode('utf-8')).hexdigest()
+        return cache, key
+
+    def changesParserState(self):
+        """Tell if the document sets roles or the default domain.
+
+        Interpreted text in a cached table would keep the meaning it had
+        when the table was built.
+        """
+        lines = self.state_machine.input_lines
+        while getattr(lines, 'parent', None) is not None:
+            lines = lines.parent
+        document = self.state.document
+        # included files make the document longer
+        known = getattr(document, 't3fieldlisttable_parser_state', None)
+        if known is None or known[0] != len(lines):
+            changes = bool(PARSER_STATE_RE.search(u'\n'.join(lines)))
+            known = document.t3fieldlisttable_parser_state = (len(lines),
+                                                              changes)
+        return known[1]
+
+    def getCacheSettings(self):
+        """Return the settings that influence the resulting nodes."""
+        return (getattr(self.state.document.settings,
+                        'field_list_table_off', False),
+                self.getSetting('validate', False),
+                self.getSetting('collect_errors', False),
+                self.useCompactNodes())
+
+    def isCacheable(self, result):
+        for node in result:
+            for child in traverse(node):
+                if isinstance(child, UNCACHEABLE_NODES):
+                    return False
+                if not isinstance(child, nodes.Element):
+                    continue
+                if (child['ids'] or child['names'] or child.get('refname')
+                        or child.get('anonymous')):
+                    return False
+        return True
+
+    def copyForCache(self, result):
+        copies = []
+        for node in result:
+            node = node.deepcopy()
+            for child in traverse(node):
+                # don't keep the document alive in the environment
+                child.document = None
+            copies.append(node)
+        return copies
+
+    def restoreCachedResult(self, cached):
+        """Return a copy of cached nodes with line numbers adjusted."""
+        lineno, cachedNodes = cached[1:]
+        delta = self.lineno - lineno
+        result = []
+        for cachedNode in cachedNodes:
+            node = cachedNode.deepcopy()
+            if delta:
+                for child in traverse(node):
+                    if getattr(child, 'line', None):
+                        child.line += delta
+            result.append(node)
+        # nested_parse() leaves the document without a current position.
+        # Do the same so the nodes get the source info of a real parse.
+        self.state.document.note_source(None, None)
+        return result
 
     def crop(self, text, maxlines=10, maxlen=800, moretext='\n[...]'):
         lines = text[:maxlen].split('\n',maxlines)
@@ -181,38 +1387,94 @@ class FieldListTable(Table):
             sourceinfo, line=self.lineno)
         return error
 
+    def errorReport(self, msg):
+        """Return one error message for all errors in `self.errors`."""
+        if self.cropped is None:
+            self.cropped = self.crop(self.block_text, 10, 800, '\n[...]')
+        sourceinfo = nodes.container('')
+        lines = ['Errors:', '']
+        for rowNum, colNum, errorMsg in self.errors:
+            where = []
+            if not rowNum is None:
+                where.append('rowNum: %s' % rowNum)
+            if not colNum is None:
+                where.append('colNum: %s' % colNum)
+            lines.append('%s  %s' % (', '.join(where) or '-', errorMsg))
+        sourceinfo += nodes.literal_block('', '\n'.join(lines))
+        sourceinfo += nodes.literal_block(self.cropped, self.cropped)
+        error = self.state_machine.reporter.error(
+            'Error in directive "%s": %s' % (self.name, msg),
+            sourceinfo, line=self.lineno)
+        return error
+
+    def recordError(self, msg, rowNum, colNum):
+        """Raise FieldListTableError, or remember `msg` and go on.
+
+        Errors are remembered in `self.errors` when
+        ``t3fieldlisttable_collect_errors`` is set.
+        """
+        if self.errors is None:
+            raise FieldListTableError(msg)
+        self.errors.append((rowNum, colNum, msg))
+
+    def isCommentField(self, field):
+        """A field name like '-----' only consists of a drawing char."""
+        fieldName = field[0]
+        if (fieldName.rawsource
+                and not fieldName.rawsource[0] in COMMENT_CANDIDATE_CHARS):
+            return False
+        fieldNameAsText = fieldName.astext()
+        self.counters['astext'] += 1
+        firstChar = fieldNameAsText[0]
+        if firstChar in COMMENT_DRAWING_CHARS:
+            if (firstChar * len(fieldNameAsText)) == fieldNameAsText:
+                return True
+        return False
+
+    def withoutComments(self, fields):
+        """Return `fields` itself if there are no comment fields.
+
+        Otherwise return a new list with the other fields.
+        """
+        for i, field in enumerate(fields):
+            if self.isCommentField(field):
+                break
+        else:
+            return fields
+        result = fields[:i]
+        for field in fields[i+1:]:
+            if not self.isCommentField(field):
+                result.append(field)
+        return result
+
     def removeComments(self, bulletList):
-        newBulletList = nodes.bullet_list()
-        for bulletListItem in bulletList:
-            newFieldList = nodes.field_list()
+        """Remove comment fields and comment rows in place."""
+        listItems = None
+        for i, bulletListItem in enumerate(bulletList):
             fieldList = bulletListItem[0]
-            for field in fieldList:
-                fieldName = field[0]
-                fieldNameAsText = fieldName.astext()
-                firstChar = fieldNameAsText[0]
-                if firstChar in COMMENT_DRAWING_CHARS:
-                    if (firstChar * len(fieldNameAsText)) == fieldNameAsText:
-                        pass
-                    else:
-                        newFieldList += field
-                else:
-                    newFieldList += field
-            if len(newFieldList):
-                newListItem = nodes.list_item()
-                newListItem += newFieldList
-                newBulletList += newListItem
-        return newBulletList
+            fields = self.withoutComments(fieldList.children)
+            if fields is not fieldList.children:
+                fieldList.children[:] = fields
+            if not fields and listItems is None:
+                listItems = bulletList.children[:i]
+            elif fields and listItems is not None:
+                listItems.append(bulletListItem)
+        if listItems is not None:
+            bulletList.children[:] = listItems
+        return bulletList
 
     def processDefinitionRow(self, listItem):
+        self.processDefinitionFields(listItem[0])
+
+    def processDefinitionFields(self, fieldList):
         dataRow = []
         infoRow = []
-        lenOfListItem = len(listItem)
-        fieldList = listItem[0]
         self.rowNum = 0
         for self.colNum, field in enumerate(fieldList):
             fieldName = field[0]
             fieldBody = field[1]
             fieldNameRaw = fieldName.astext()
+            self.counters['astext'] += 1
             columnIdRaw,colwidth,align,more = self.getPartsOfFieldname(
                 fieldNameRaw, isDefinitionRow=True)
             # in case of definition row:
@@ -230,18 +1492,18 @@ class FieldListTable(Table):
             if self.columnIdsIndexes.get(columnId, None) != None:
                 msg = "Duplicate column '%s'." % columnId
                 raise FieldListTableError(msg)
-            cellInfo = {}
-            cellInfo['columnId'     ] = columnId
-            cellInfo['columnIdRange'] = columnIdRange
-            cellInfo['columnIdRaw'  ] = columnIdRaw
-            cellInfo['fieldNameRaw' ] = fieldNameRaw
-            cellInfo['align'        ] = align
-            cellInfo['more'         ] = more
-            cellInfo['colspan'      ] = 1
-            cellInfo['rowspan'      ] = 1
-            cellInfo['colNum'       ] = self.colNum
-            cellInfo['rowNum'       ] = self.rowNum
-            cellInfo['colwidth'     ] = colwidth
+            cellInfo = CellInfo()
+            cellInfo.columnId      = columnId
+            cellInfo.columnIdRange = columnIdRange
+            cellInfo.columnIdRaw   = columnIdRaw
+            cellInfo.fieldNameRaw  = fieldNameRaw
+            cellInfo.align         = align
+            cellInfo.more          = more
+            cellInfo.colspan       = 1
+            cellInfo.rowspan       = 1
+            cellInfo.colNum        = self.colNum
+            cellInfo.rowNum        = self.rowNum
+            cellInfo.colwidth      = colwidth
 
             self.columnIds.append(columnId)
             self.columnIdsIndexes[columnId] = self.colNum
@@ -253,41 +1515,85 @@ class FieldListTable(Table):
         self.tableData.append(dataRow)
 
 
+    def getColumnAligns(self):
+        """Return `(hAlign, vAlign, align)` of the definition row per column.
+
+        `align` is the alignment of a cell that has none of its own.
+        """
+        columnAligns = []
+        for info in self.tableInfo[0]:
+            if info.align:
+                dummy, colHAlign, colVAlign = parseAlignment(info.align)
+            else:
+                colHAlign = colVAlign = ()
+            columnAligns.append((colHAlign, colVAlign,
+                                 ' '.join(colHAlign + colVAlign)))
+        return columnAligns
+
     def processDataRows(self,bulletList):
+        columnAligns = self.getColumnAligns()
         for rowNum in range(1, len(bulletList)):
             bulletListItem = bulletList[rowNum]
             fieldList = bulletListItem[0]
-            dataRow = []
-            for cell in self.columnIds:
-                dataRow.append(None)
-            infoRow = []
-            for cell in self.columnIds:
-                infoRow.append({})
-            for fieldNum, field in enumerate(fieldList):
+            dataRow, infoRow = self.processDataFields(rowNum, fieldList,
+                                                      columnAligns,
+                                                      self.errors)
+            self.tableInfo.append(infoRow)
+            self.tableData.append(dataRow)
+
+    def processDataFields(self, rowNum, fieldList, columnAligns,
+                          errors=None):
+        """Return `dataRow` and `infoRow` for the fields of one row.
+
+        With a list for `errors` a bad field is noted there and the next
+        field is processed.
+        """
+        counters = self.counters
+        columnIdsIndexes = self.columnIdsIndexes
+        dataRow = []
+        for cell in self.columnIds:
+            dataRow.append(None)
+        infoRow = []
+        for cell in self.columnIds:
+            infoRow.append(CellInfo())
+        for fieldNum, field in enumerate(fieldList):
+            if errors is not None:
+                self.colNum = None
+            try:
                 fieldName = field[0]
                 fieldNameRaw = fieldName.astext()
-                (columnIdRaw, colwidth, align, more) = \
-                    self.getPartsOfFieldname(fieldNameRaw)
-                rowspanSituation = False
-                if columnIdRaw.startswith('('):
-                    if not columnIdRaw.endswith(')'):
-                        msg = "Illegal field name '%s'." % fieldNameRaw
-                        raise FieldListTableError(msg)
-                    rowspanSituation = True
-                    columnIdRange = columnIdRaw[1:-1]
-                else:
-                    columnIdRange = columnIdRaw
-
-                colspan_situation = '..' in columnIdRange
-                if colspan_situation:
-                    columnId, endId = columnIdRange.split('..', 1)
-                    startIdIndex = self.columnIdsIndexes.get(columnId, None)
-                    endIdIndex = self.columnIdsIndexes.get(endId, None)
-                else:
-                    columnId = columnIdRange
-                    endId    = columnIdRange
-                    startIdIndex = self.columnIdsIndexes.get(columnId, None)
-                    endIdIndex = startIdIndex
+                counters['astext'] += 1
+                index = columnIdsIndexes.get(fieldNameRaw)
+                if (index is not None and dataRow[index] is None
+                        and not infoRow[index].isInColspan):
+                    # Just the name of a column: no span, no alignment.
+                    # This is what the general way below ends up with.
+                    self.colNum = index
+                    cellInfo = infoRow[index]
+                    cellInfo.colNum        = index
+                    cellInfo.rowNum        = rowNum
+                    cellInfo.columnId      = fieldNameRaw
+                    cellInfo.columnIdRange = fieldNameRaw
+                    cellInfo.columnIdRaw   = fieldNameRaw
+                    cellInfo.fieldNameRaw  = fieldNameRaw
+                    align = columnAligns[index][2]
+                    if align:
+                        cellInfo.align = align
+                    dataRow[index] = field[1].children
+                    continue
+                parsed = self.checkFieldName(fieldNameRaw)
+                columnIdRaw = parsed.columnIdRaw
+                if parsed.isIllegal:
+                    msg = "Illegal field name '%s'." % fieldNameRaw
+                    raise FieldListTableError(msg)
+                rowspanSituation = parsed.isRowspan
+                if rowspanSituation:
+                    self.hasRowspans = True
+                columnIdRange = parsed.columnIdRange
+                columnId = parsed.columnId
+                endId = parsed.endId
+                startIdIndex = self.columnIdsIndexes.get(columnId, None)
+                endIdIndex = self.columnIdsIndexes.get(endId, None)
                 if startIdIndex is None:
                     msg = ("Field '%s' of range '%s' does not exist."
                            % (columnId, columnIdRange))
@@ -300,59 +1606,57 @@ class FieldListTable(Table):
                     msg = ("Field names '%s' and '%s' in range '%s' have "
                            "wrong order." % (columnId, endId, columnIdRange))
                     raise FieldListTableError(msg)
-                # check and prepare what has been given as alignment spec
-                if align:
-                    dummy, hAlign, vAlign = self.isValidAlignment(align)
-                else:
-                    hAlign = []
-                    vAlign = []
-                colAlign = self.tableInfo[0][startIdIndex].get('align', None)
-                if colAlign:
-                    dummy, colHAlign, colVAlign = self.isValidAlignment(
-                        colAlign)
-                else:
-                    colHAlign = []
-                    colVAlign = []
-                align = ' ' .join((hAlign or colHAlign) +
-                                  (vAlign or colVAlign))
+                # the alignment of the cell wins over that of the column
+                colHAlign, colVAlign, colAlign = columnAligns[startIdIndex]
+                align = ' ' .join((parsed.hAlign or colHAlign) +
+                                  (parsed.vAlign or colVAlign))
                 for self.colNum in range(startIdIndex, endIdIndex + 1):
                     if not dataRow[self.colNum] is None:
                         msg = ("Value for column %s ('%s') is specified "
                                "more than once." % (self.colNum + 1,
-                            self.tableInfo[0][self.colNum]['columnId']))
+                            self.tableInfo[0][self.colNum].columnId))
                         raise FieldListTableError(msg)
-                if infoRow[startIdIndex].get('isInColspan',None):
+                if infoRow[startIdIndex].isInColspan:
                     msg = ("Value for table column %s ('%s') is specified "
                            "more than once." % (startIdIndex + 1,
-                            self.tableInfo[0][startIdIndex]['columnId']))
+                            self.tableInfo[0][startIdIndex].columnId))
                     raise FieldListTableError(msg)
-                infoRow[startIdIndex]['colNum'        ] = startIdIndex
-                infoRow[startIdIndex]['rowNum'        ] = rowNum
-                infoRow[startIdIndex]['columnId'      ] = columnId
-                infoRow[startIdIndex]['columnIdRange' ] = columnIdRange
-                infoRow[startIdIndex]['columnIdRaw'   ] = columnIdRaw
-                infoRow[startIdIndex]['fieldNameRaw'  ] = fieldNameRaw
+                cellInfo = infoRow[startIdIndex]
+                cellInfo.colNum        = startIdIndex
+                cellInfo.rowNum        = rowNum
+                cellInfo.columnId      = columnId
+                cellInfo.columnIdRange = columnIdRange
+                cellInfo.columnIdRaw   = columnIdRaw
+                cellInfo.fieldNameRaw  = fieldNameRaw
                 if align:
-                    infoRow[startIdIndex]['align'] = align
+                    cellInfo.align = align
                 fieldBody = field[1]
                 if rowspanSituation:
                     if fieldBody.children:
                         msg = ("No content is allowed for cells that are "
                                "covered by a rowspan.")
                         raise FieldListTableError(msg)
-                    infoRow[startIdIndex]['isFollowingRow'] = True
+                    cellInfo.isFollowingRow = True
                     rowspanSituation = False
                 else:
                     dataRow[startIdIndex] = fieldBody.children
                 colspan = endIdIndex - startIdIndex
                 if colspan:
-                    infoRow[startIdIndex]['colspan'] = colspan + 1
+                    cellInfo.colspan = colspan + 1
                     for i in range(startIdIndex + 1 , endIdIndex + 1):
-                        infoRow[i]['colNum'] = i
-                        infoRow[i]['rowNum'] = rowNum
-                        infoRow[i]['isInColspan'] = True
-            self.tableInfo.append(infoRow)
-            self.tableData.append(dataRow)
+                        infoRow[i].colNum = i
+                        infoRow[i].rowNum = rowNum
+                        infoRow[i].isInColspan = True
+            except FieldListTableError as e:
+                if errors is None:
+                    raise
+                if self.colNum is None:
+                    # the field failed before its column was looked up
+                    self.colNum = columnIdsIndexes.get(
+                        parseFieldName(fieldNameRaw).columnId)
+                errors.append((rowNum, self.colNum, str(e)))
+                self.failedFields.setdefault(rowNum, set()).add(self.colNum)
+        return dataRow, infoRow
 
     def adjustColumnWidths(self):
         resultRow = []
@@ -362,7 +1666,7 @@ class FieldListTable(Table):
             cntMissingOnes = 0
             infoRow = self.tableInfo[0]
             for info in infoRow:
-                colwidth = info['colwidth']
+                colwidth = info.colwidth
                 if colwidth is None or colwidth == '':
                     cntMissingOnes += 1
                 else:
@@ -397,14 +1701,14 @@ class FieldListTable(Table):
                     resultRow[i] = widthToInsert
                     widthInserted += widthToInsert
                     nToGo = nToGo - 1
-                infoRow[i]['colwidth'] = resultRow[i]
+                infoRow[i].colwidth = resultRow[i]
 
     def checkAlignments(self):
         # see http://www.loc.gov/ead/tglib/att_tab.html
         # for ideas about naming alignments
         infoRow = self.tableInfo[0]
         for i,info in enumerate(infoRow):
-            v = info['align']
+            v = info.align
             if v:
                 canonical, hAlign, vAlign = self.isValidAlignment(v)
                 if not canonical:
@@ -414,62 +1718,28 @@ class FieldListTable(Table):
                     v = canonical
 
     def isValidAlignment(self, v):
-        hAlign = []
-        vAlign = []
-        for part in v.split(' '):
-            partLower = part.lower()
-            valid = False
-            for canonical in ['left', 'right', 'center', 'justify']:
-                if canonical.startswith(partLower):
-                    valid = True
-                    if not canonical in hAlign:
-                        hAlign.append(canonical)
-                    break
-            if not valid:
-                for canonical in ['top', 'bottom', 'middle']:
-                    if canonical.startswith(partLower):
-                        valid = True
-                        if not canonical in vAlign:
-                            vAlign.append(canonical)
-                        break
-        if not valid or len(hAlign)>1 or len(vAlign)>1:
-            canonical = False
-        else:
-            canonical = ' '.join(hAlign + vAlign)
-        return canonical, hAlign, vAlign
+        canonical, hAlign, vAlign = parseAlignment(v)
+        return canonical, list(hAlign), list(vAlign)
+
+    def checkFieldName(self, fieldNameRaw, isDefinitionRow=False):
+        """Return the parsed field name. Raise errors for bad specs."""
+        fieldName = parseFieldName(fieldNameRaw)
+        if fieldName.colwidth and not isDefinitionRow:
+            msg = ("Column width specification is only allowed in "
+                   "the definition row (first row).")
+            raise FieldListTableError(msg)
+        if not fieldName.alignIsValid:
+            msg = "Unknown alignment '%s'." % fieldName.align
+            raise FieldListTableError(msg)
+        return fieldName
 
     def getPartsOfFieldname(self, fieldNameRaw, isDefinitionRow=False):
-        parts = fieldNameRaw.split(',')
-        lenParts = len(parts)
-        columnIdRaw = parts[0].strip()
-        colwidth = None
-        align = None
-        more = None
-        if lenParts > 1:
-            colwidth = parts[1].strip()
-            if lenParts > 2:
-                align = parts[2].strip()
-                if lenParts > 3:
-                    more = parts[3:]
-        if colwidth:
-            if not isDefinitionRow:
-                msg = ("Column width specification is only allowed in "
-                       "the definition row (first row).")
-                raise FieldListTableError(msg)
-        else:
-            colwidth = None
-        if align:
-            canonical, hAlign, vAlign = self.isValidAlignment(align)
-            if not canonical:
-                msg = "Unknown alignment '%s'." % align
-                raise FieldListTableError(msg)
-            else:
-                align = canonical
-        else:
-            align = None
-        if not more:
-            more = None
-        result = (columnIdRaw, colwidth, align, more)
+        fieldName = self.checkFieldName(fieldNameRaw, isDefinitionRow)
+        more = fieldName.more
+        if more is not None:
+            more = list(more)
+        result = (fieldName.columnIdRaw, fieldName.colwidth,
+                  fieldName.align, more)
         return result
 
     def checkMoreAttributes(self):
@@ -482,7 +1752,7 @@ class FieldListTable(Table):
                 msg = ("Exactly one item (a field list) for bullet list "
                        "item expected. %s items found instead." % listLen)
                 raise FieldListTableError(msg)
-            if not isinstance(listItem[0], nodes.field_list):
+            if not isinstance(listItem[0], (nodes.field_list, PrescanNode)):
                 msg = ("Exactly on field list as bullet list item "
                        "expected.")
                 raise FieldListTableError(msg)
@@ -495,8 +1765,8 @@ class FieldListTable(Table):
                 msg = ''
             msg += ("%s header row(s) specified but only %s row(s) "
                    "supplied." % (header_rows, len(rows)))
-            raise FieldListTableError(msg)
-        if (len(rows)-self.definitionRow) == header_rows:
+            self.recordError(msg, None, None)
+        elif (len(rows)-self.definitionRow) == header_rows:
             if self.definitionRow:
                 msg = "1 definition row and "
             else:
@@ -504,140 +1774,884 @@ class FieldListTable(Table):
             msg += ("%s header row(s) specified but only %s row(s) "
                    "supplied. There's no data remaining for the table body."
                     % (header_rows, len(rows)))
-            raise FieldListTableError(msg)
-        for row in rows:
+            self.recordError(msg, None, None)
+        for rowNum, row in enumerate(rows):
             if len(row) < stub_columns:
                 msg = ("%s stub column(s) specified but only %s column(s) "
                        "supplied." % (stub_columns, len(row)))
-                raise FieldListTableError(msg)
-            if len(row) == stub_columns > 0:
+                self.recordError(msg, rowNum, None)
+                # all rows have the same number of columns
+                break
+            elif len(row) == stub_columns > 0:
                 msg = ("%s stub column(s) specified but only %s column(s) "
                        "supplied. There is no data remaining for the "
                        "table body."
                        % (stub_columns, len(row)))
-                raise FieldListTableError(msg)
+                self.recordError(msg, rowNum, None)
+                break
 
     def checkRowspans(self):
         headerRows = self.options.get('header-rows', 0)
         firstTBodyRow = headerRows + self.definitionRow
-        for info in self.tableInfo[0]:
-            if info.get('isFollowingRow'):
+        for colNum, info in enumerate(self.tableInfo[0]):
+            if info.isFollowingRow:
                 msg = ("The first table row is the definition row. It cannot "
                        "have cells that belong to a previous rowspan.")
-                raise FieldListTableError(msg)
-        for info in self.tableInfo[firstTBodyRow]:
-            if info.get('isFollowingRow', False):
+                self.recordError(msg, 0, colNum)
+        if firstTBodyRow >= len(self.tableInfo):
+            # errors are collected and checkTableDimensions() complained
+            return
+        if not self.hasRowspans:
+            # a table without rowspans has nothing to check or resolve
+            self.rowNum = self.definitionRow
+            self.colNum = len(self.tableInfo[self.definitionRow]) - 1
+            return
+        for colNum, info in enumerate(self.tableInfo[firstTBodyRow]):
+            if info.isFollowingRow:
                 msg = ("The first table body row cannot have cells that "
                        "belong to a previous rowspan.")
-                raise FieldListTableError(msg)
-        for self.rowNum in range(len(self.tableData)-1,
-                                 self.definitionRow-1,
-                                 -1):
-            infoRow = self.tableInfo[self.rowNum]
-            for self.colNum, info in enumerate(infoRow):
-                if info.get('isFollowingRow'):
-                    rowspan = 1
-                    found = False
-                    for rowNum2 in range(self.rowNum - 1,
-                                         self.definitionRow-1,
-                                         -1):
-                        rowspan += 1
-                        info2 = self.tableInfo[rowNum2][self.colNum]
-                        if info2.get('isInColspan'):
-                            msg = ("rowspan '%s' does not match previous "
-                                   "row. Found a colspan instead." %
-                                   (info['columnIdRange'],))
-                            raise FieldListTableError(msg)
-                        val2 = info2.get('columnIdRange', None)
-                        val1 = info.get('columnIdRange', None)
-                        if val2  != val1 :
-                            msg = ("rowspan '%s' does not match previous "
-                                   "field '%s'" % (val1, val2))
-                            raise FieldListTableError(msg)
-                        if not info2.get('isFollowingRow'):
-                            if info2.get('rowspan', None) is None:
-                                info2['rowspan'] = rowspan
-                            found = True
-                        if found:
-                            break
+                self.recordError(msg, firstTBodyRow, colNum)
+        # Errors are reported like a scan from the bottom row upwards would
+        # do: the lowest row wins and within a row the leftmost column.
+        error = None
+        tableInfo = self.tableInfo
+        openSpans = [None] * len(tableInfo[0])
+        prevInfoRow = None
+        for rowNum in range(self.definitionRow, len(self.tableData)):
+            infoRow = tableInfo[rowNum]
+            rowError = self.trackRowspans(rowNum, infoRow, prevInfoRow,
+                                          openSpans, self.errors)
+            if rowError is not None:
+                error = (rowNum,) + rowError
+            prevInfoRow = infoRow
+        if error is not None and self.errors is None:
+            self.rowNum, self.colNum, msg = error
+            raise FieldListTableError(msg)
+        self.rowNum = self.definitionRow
+        self.colNum = len(tableInfo[self.definitionRow]) - 1
+
+    def trackRowspans(self, rowNum, infoRow, prevInfoRow, openSpans,
+                      errors=None):
+        """Resolve the cells of `infoRow` that continue a rowspan.
+
+        A cell 'isFollowingRow' belongs to the rowspan that starts in the
+        nearest row above with a regular cell of the same range. Rows are
+        passed in from top to bottom. `openSpans` remembers per column the
+        outcome for the rowspan that is open there: None, (msg,) or
+        (anchorInfo, anchorRowNum, rowspanIsUnset). The rowspan of the
+        anchor cell is updated on the way.
+
+        Return `(colNum, msg)` for the leftmost error or None. With a list
+        for `errors` every new error of the row is added as `(rowNum,
+        colNum, msg)`. Cells below a field that already failed are not
+        checked then.
+        """
+        error = None
+        failed = None
+        if errors is not None:
+            failed = self.failedFields.get(rowNum - 1)
+        for colNum, info in enumerate(infoRow):
+            if not info.isFollowingRow:
+                openSpans[colNum] = None
+                continue
+            inherited = False
+            if prevInfoRow is None:
+                outcome = None
+            else:
+                info2 = prevInfoRow[colNum]
+                val1 = info.columnIdRange
+                val2 = info2.columnIdRange
+                if failed and (colNum in failed or val2 is None
+                               and not info2.isInColspan):
+                    # the field above may be the broken one, so there is
+                    # nothing to compare with
+                    outcome = None
+                elif info2.isInColspan:
+                    msg = ("rowspan '%s' does not match previous "
+                           "row. Found a colspan instead." % (val1,))
+                    outcome = (msg,)
+                elif val2 != val1:
+                    msg = ("rowspan '%s' does not match previous "
+                           "field '%s'" % (val1, val2))
+                    outcome = (msg,)
+                elif info2.isFollowingRow:
+                    outcome = openSpans[colNum]
+                    inherited = True
+                else:
+                    outcome = (info2, rowNum - 1, info2.rowspan is None)
+            openSpans[colNum] = outcome
+            if outcome is None:
+                pass
+            elif len(outcome) == 1:
+                if error is None:
+                    error = (colNum, outcome[0])
+                if errors is not None and not inherited:
+                    errors.append((rowNum, colNum, outcome[0]))
+            elif outcome[2]:
+                outcome[0].rowspan = rowNum - outcome[1] + 1
+        return error
 
     def buildTableFromFieldList(self, headerRows, stubColumns):
+        table, tgroup = self.buildTableSkeleton(stubColumns)
+        rows = []
+        for self.rowNum, row in enumerate(self.tableData):
+            if self.definitionRow and self.rowNum == 0:
+                continue
+            rows.append(self.buildRow(row, self.tableInfo[self.rowNum]))
+        self.addRows(tgroup, rows, headerRows)
+        return table
+
+    def buildTableSkeleton(self, stubColumns):
+        """Return the table and tgroup nodes with the colspecs."""
+        counters = self.counters
         table = nodes.table()
         tgroup = nodes.tgroup(cols=len(self.tableInfo[0]))
         table += tgroup
+        counters['nodes'] += 2
         for info in self.tableInfo[0]:
-            colwidth = info['colwidth']
+            colwidth = info.colwidth
             colspec = nodes.colspec(colwidth=colwidth)
+            counters['nodes'] += 1
             if stubColumns:
                 colspec.attributes['stub'] = 1
                 stubColumns = stubColumns - 1
-            if not info['align'] is None:
-                colspec.attributes['align'] = info['align']
-            if not info['more'] is None:
-                colspec.attributes['more'] = info['more']
+            if not info.align is None:
+                colspec.attributes['align'] = info.align
+            if not info.more is None:
+                colspec.attributes['more'] = info.more
             tgroup += colspec
-        rows = []
-        for self.rowNum, row in enumerate(self.tableData):
-            if self.definitionRow and self.rowNum == 0:
-                continue
-            rowNode = nodes.row()
-            for self.colNum, cell in enumerate(row):
-                info = self.tableInfo[self.rowNum][self.colNum]
-                if info.get('isInColspan'):
-                    pass
-                elif info.get('isFollowingRow'):
-                    pass
-                else:
-                    entry = nodes.entry()
-                    if self.options.get('debug-cellinfo') in ['yes','1']:
-                        interesting = [
-                            (1,'colNum'),
-                            (1,'rowNum'),
-                            (0,'colwidth'),
-                            (0,'columnId'),
-                            (0,'align'),
-                            (0,'more'),
-                            (1,'colspan'),
-                            (1,'rowspan'),
-                            (1,'columnIdRange'),
-                            (1,'columnIdRaw'),
-                            (1,'fieldNameRaw')]
-                        debugLines = []
-                        for flag,k in interesting:
-                            if flag:
-                                debugLines.append('| %s=%s \n' %
-                                                  (k, info.get(k)))
-                        if debugLines:
-                            p = nodes.paragraph('', ''.join(debugLines))
-                            entry += p
-                    entry += cell
-                    info = self.tableInfo[self.rowNum][self.colNum]
-                    morecols = info.get('colspan',1) - 1
-                    if morecols:
-                        entry.attributes['morecols'] = morecols
-                    morerows = info.get('rowspan', 1) - 1
-                    if morerows:
-                        entry.attributes['morerows'] = morerows
-                    align = info.get('align')
-                    if align:
-                        entry.attributes['align'] = align
-                    more = info.get('more')
-                    if more:
-                        entry.attributes['more'] = more
-                    rowNode += entry
-            rows.append(rowNode)
+        return table, tgroup
+
+    def buildRow(self, row, infoRow, lastEntries=None):
+        """Return the row node for the cells of one row.
+
+        If given, `lastEntries` receives the entry of each column that has
+        one.
+        """
+        counters = self.counters
+        rowNode = nodes.row()
+        counters['nodes'] += 1
+        for self.colNum, cell in enumerate(row):
+            info = infoRow[self.colNum]
+            if info.isInColspan:
+                pass
+            elif info.isFollowingRow:
+                pass
+            else:
+                entry = nodes.entry()
+                counters['nodes'] += 1
+                counters['cells'] += 1
+                if self.options.get('debug-cellinfo') in ['yes','1']:
+                    interesting = [
+                        (1,'colNum'),
+                        (1,'rowNum'),
+                        (0,'colwidth'),
+                        (0,'columnId'),
+                        (0,'align'),
+                        (0,'more'),
+                        (1,'colspan'),
+                        (1,'rowspan'),
+                        (1,'columnIdRange'),
+                        (1,'columnIdRaw'),
+                        (1,'fieldNameRaw')]
+                    debugLines = []
+                    for flag,k in interesting:
+                        if flag:
+                            debugLines.append('| %s=%s \n' %
+                                              (k, getattr(info, k)))
+                    if debugLines:
+                        p = nodes.paragraph('', ''.join(debugLines))
+                        counters['nodes'] += 1
+                        entry += p
+                self.moveCellBody(entry, cell)
+                morecols = (info.colspan or 1) - 1
+                if morecols:
+                    entry.attributes['morecols'] = morecols
+                morerows = (info.rowspan or 1) - 1
+                if morerows:
+                    entry.attributes['morerows'] = morerows
+                if morecols or morerows:
+                    counters['spans'] += 1
+                align = info.align
+                if align:
+                    entry.attributes['align'] = align
+                more = info.more
+                if more:
+                    entry.attributes['more'] = more
+                rowNode += entry
+                if lastEntries is not None:
+                    lastEntries[self.colNum] = entry
+        return rowNode
+
+    def moveCellBody(self, entry, cell):
+        """Make the nodes of a field body the children of `entry`.
+
+        The list of nodes is taken over as it is, nothing is copied.
+        """
+        if cell is None:
+            return
+        if entry.children:
+            entry.extend(cell)
+            return
+        entry.children = cell
+        for child in cell:
+            entry.setup_child(child)
+
+    def addRows(self, tgroup, rows, headerRows):
+        counters = self.counters
         if headerRows:
             thead = nodes.thead()
+            counters['nodes'] += 1
             thead.extend(rows[:headerRows])
             tgroup += thead
         tbody = nodes.tbody()
+        counters['nodes'] += 1
         tbody.extend(rows[headerRows:])
         tgroup += tbody
+
+    def splitTable(self, table, maxRows):
+        """Return a list of tables with at most `maxRows` body rows each.
+
+        Every table gets the colspecs and the header rows. A rowspan is
+        never cut, so a table is longer if a rowspan needs it.
+        """
+        counters = self.counters
+        tgroup = table[0]
+        tbody = tgroup[-1]
+        rows = tbody.children
+        if len(rows) <= maxRows:
+            return [table]
+        chunks = []
+        start = 0
+        candidate = None
+        reach = -1
+        for i, row in enumerate(rows):
+            for entry in row:
+                reach = max(reach, i + entry.get('morerows', 0))
+            if reach != i:
+                # a rowspan continues in the next row
+                continue
+            stop = i + 1
+            if stop - start > maxRows and candidate is not None:
+                chunks.append((start, candidate))
+                start = candidate
+            if stop - start >= maxRows:
+                chunks.append((start, stop))
+                start = stop
+                candidate = None
+            else:
+                candidate = stop
+        if start < len(rows):
+            chunks.append((start, len(rows)))
+        heads = tgroup.children[:-1]
+        tables = []
+        for start, stop in chunks:
+            newTable = table.copy()
+            newTgroup = tgroup.copy()
+            newTable += newTgroup
+            counters['nodes'] += 3
+            for node in heads:
+                if tables:
+                    node = node.deepcopy()
+                    counters['nodes'] += len(list(traverse(node)))
+                newTgroup += node
+            newTbody = tbody.copy()
+            newTbody.extend(rows[start:stop])
+            newTgroup += newTbody
+            tables.append(newTable)
+        return tables
+
+    def resolveRowspansOfRow(self, rowNum, infoRow, prevInfoRow, openSpans,
+                             lastEntries, firstTBodyRow):
+        """Check the rowspans of a row and update the entries above."""
+        if self.trackRowspans(rowNum, infoRow, prevInfoRow,
+                              openSpans) is not None:
+            raise FieldListTableError('Bad rowspan.')
+        counters = self.counters
+        for colNum, info in enumerate(infoRow):
+            if not info.isFollowingRow:
+                continue
+            if rowNum == firstTBodyRow:
+                raise FieldListTableError('Bad rowspan.')
+            outcome = openSpans[colNum]
+            if outcome is not None and outcome[2]:
+                entry = lastEntries[colNum]
+                if not ('morecols' in entry or 'morerows' in entry):
+                    counters['spans'] += 1
+                entry['morerows'] = outcome[0].rowspan - 1
+
+    def buildTableInOnePass(self, bulletList, headerRows, stubColumns):
+        """Build the table while walking over the bullet list only once.
+
+        Each bullet list item is checked, freed from comment fields,
+        resolved and turned into a row right away. Rowspans are resolved
+        while walking down. Any problem simply raises FieldListTableError.
+        `bulletList` may be any iterable of list items, like the ones of
+        `takeItems()`.
+
+        There is no error reporting of its own: the fused engine catches
+        the error and runs the classic passes on the same bullet list,
+        the streaming engine runs the classic checks on the outlines of
+        the rows, see `OutlinedItems`. Either reports the error with the
+        usual context. That way the fast path stays short and all engines
+        give the same messages. For that reason the field lists of the
+        items are never changed.
+        """
+        allowComments = self.options.get('allow-comments', True)
+        firstTBodyRow = headerRows + self.definitionRow
+        rows = []
+        rowNum = 0
+        for listItem in bulletList:
+            if (len(listItem) != 1
+                    or not isinstance(listItem[0], nodes.field_list)):
+                raise FieldListTableError('Bad bullet list item.')
+            fields = listItem[0].children
+            if allowComments:
+                fields = self.withoutComments(fields)
+                if not fields:
+                    continue
+            if rowNum == 0:
+                self.processDefinitionFields(fields)
+                self.adjustColumnWidths()
+                self.checkAlignments()
+                columnAligns = self.getColumnAligns()
+                table, tgroup = self.buildTableSkeleton(stubColumns)
+                openSpans = [None] * len(self.columnIds)
+                lastEntries = [None] * len(self.columnIds)
+                infoRow = self.tableInfo[0]
+                if not self.definitionRow:
+                    rows.append(self.buildRow(self.tableData[0], infoRow,
+                                              lastEntries))
+            else:
+                dataRow, infoRow = self.processDataFields(rowNum, fields,
+                                                          columnAligns)
+                if rowNum == self.definitionRow:
+                    prevInfoRow = None
+                if self.hasRowspans:
+                    # until the first rowspan all of openSpans stays None
+                    self.resolveRowspansOfRow(rowNum, infoRow, prevInfoRow,
+                                              openSpans, lastEntries,
+                                              firstTBodyRow)
+                rows.append(self.buildRow(dataRow, infoRow, lastEntries))
+            prevInfoRow = infoRow
+            rowNum += 1
+        if rowNum == 0:
+            raise FieldListTableError('No rows.')
+        if rowNum - self.definitionRow <= headerRows:
+            raise FieldListTableError('Not enough rows.')
+        if stubColumns and len(self.columnIds) <= stubColumns:
+            raise FieldListTableError('Not enough columns.')
+        self.addRows(tgroup, rows, headerRows)
         return table
 
 
+# Attributes of a compact_table that describe the grid
+COMPACT_TABLE_ATTRIBUTES = ('colspecs', 'headrows', 'rowlengths')
+
+# Keys of the __dict__ of a node that packNodes() can restore
+PACKABLE_NODE_KEYS = frozenset(['rawsource', 'children', 'attributes',
+                                'tagname', 'source', 'line', 'parent',
+                                'document', '_document'])
+
+def isPackable(node):
+    """Return True if `node` and its descendants can be packed.
+
+    Nodes that the document refers to by object, like targets or nodes
+    with ids or refnames, are pickled as they are.
+    """
+    if type(node) is nodes.Text:
+        return PACKABLE_NODE_KEYS.issuperset(node.__dict__)
+    if (not isinstance(node, nodes.Element)
+            or isinstance(node, UNCACHEABLE_NODES)
+            or not PACKABLE_NODE_KEYS.issuperset(node.__dict__)
+            or node.tagname != node.__class__.__name__
+            or node['ids'] or node['names'] or node.get('refname')
+            or node.get('anonymous')):
+        return False
+    for child in node.children:
+        if not isPackable(child):
+            return False
+    return True
+
+def packNodes(children):
+    """Return the nodes `children` and their descendants in a flat form.
+
+    Each element becomes a tuple `(classIndex, attributesIndex, rawsource,
+    source, line, number of children)` followed by its children, each
+    text a string. Equal attribute sets and equal strings are stored only
+    once, so pickle writes them once. Nodes that cannot be packed are
+    kept as they are.
+    """
+    classes = []
+    classIndexes = {}
+    attributeSets = []
+    attributeIndexes = {}
+    strings = {}
+    packed = []
+
+    def pack(node):
+        if type(node) is nodes.Text:
+            packed.append(strings.setdefault(six.text_type(node),
+                                             six.text_type(node)))
+            return
+        cls = node.__class__
+        classIndex = classIndexes.get(cls)
+        if classIndex is None:
+            classIndex = classIndexes[cls] = len(classes)
+            classes.append(cls)
+        attributes = node.non_default_attributes()
+        key = repr(sorted(attributes.items()))
+        attributesIndex = attributeIndexes.get(key)
+        if attributesIndex is None:
+            attributesIndex = attributeIndexes[key] = len(attributeSets)
+            attributeSets.append(attributes)
+        rawsource = node.rawsource
+        if isinstance(rawsource, six.string_types):
+            rawsource = strings.setdefault(rawsource, rawsource)
+        packed.append((classIndex, attributesIndex, rawsource,
+                       node.source, node.line, len(node.children)))
+        for child in node.children:
+            pack(child)
+
+    for child in children:
+        if isPackable(child):
+            pack(child)
+        else:
+            packed.append(child)
+    return (len(children), classes, attributeSets, packed)
+
+def unpackNodes(state, parent):
+    """Return the list of nodes packed by `packNodes()` below `parent`."""
+    count, classes, attributeSets, packed = state
+    items = iter(packed)
+    # Docutils before 0.18 keeps the document in each node, later
+    # versions ask the parent.
+    document = parent.__dict__.get('document')
+
+    def unpack(parent):
+        item = next(items)
+        if isinstance(item, nodes.Node):
+            node = item
+        elif isinstance(item, tuple):
+            classIndex, attributesIndex, rawsource, source, line, n = item
+            node = classes[classIndex].__new__(classes[classIndex])
+            attributes = {}
+            for key, value in attributeSets[attributesIndex].items():
+                if isinstance(value, list):
+                    value = list(value)
+                attributes[key] = value
+            nodes.Element.__init__(node, rawsource, **attributes)
+            if source is not None:
+                node.source = source
+            if line is not None:
+                node.line = line
+            for i in range(n):
+                node.children.append(unpack(node))
+        else:
+            node = nodes.Text(item)
+        node.parent = parent
+        if document is not None:
+            node.document = document
+        return node
+
+    return [unpack(parent) for i in range(count)]
+
+class compact_table(nodes.table):
+
+    """A table that keeps its grid in attributes.
+
+    The children are the optional title and the entries, row by row.
+    `colspecs` holds the attributes of the colspecs, `headrows` the number
+    of header rows and `rowlengths` the number of entries of each row. The
+    tgroup, colspec, thead, tbody and row nodes are left out.
+
+    Pickled, the children are packed by `packNodes()`, which makes the
+    doctree files of Sphinx a lot smaller.
+    """
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['children'] = packNodes(self.children)
+        return state
+
+    def __setstate__(self, state):
+        children = state['children']
+        self.__dict__.update(state)
+        if isinstance(children, tuple):
+            self.children = unpackNodes(children, self)
+
+def compactTable(table):
+    """Return a compact_table with the title and the entries of `table`."""
+    node = compact_table()
+    node.attributes = table.attributes
+    node.source = table.source
+    node.line = table.line
+    colspecs = []
+    rowLengths = []
+    headRows = 0
+    for child in table.children:
+        if not isinstance(child, nodes.tgroup):
+            node += child
+            continue
+        for part in child.children:
+            if isinstance(part, nodes.colspec):
+                colspecs.append(part.non_default_attributes())
+                continue
+            if isinstance(part, nodes.thead):
+                headRows = len(part)
+            for row in part.children:
+                rowLengths.append(len(row))
+                node.extend(row.children)
+    node['colspecs'] = colspecs
+    node['headrows'] = headRows
+    node['rowlengths'] = rowLengths
+    return node
+
+def expandTable(node):
+    """Return the classic table of a compact_table.
+
+    The children of `node` are moved to the new table.
+    """
+    table = nodes.table()
+    for key, value in node.attributes.items():
+        if not key in COMPACT_TABLE_ATTRIBUTES:
+            table[key] = value
+    table.source = node.source
+    table.line = node.line
+    children = node.children
+    node.children = []
+    start = 0
+    while start < len(children) and not isinstance(children[start],
+                                                   nodes.entry):
+        table += children[start]
+        start += 1
+    tgroup = nodes.tgroup(cols=len(node['colspecs']))
+    table += tgroup
+    for attributes in node['colspecs']:
+        tgroup += nodes.colspec(**attributes)
+    headRows = node['headrows']
+    rows = []
+    for length in node['rowlengths']:
+        row = nodes.row()
+        row.extend(children[start:start + length])
+        start += length
+        rows.append(row)
+    if headRows:
+        thead = nodes.thead()
+        thead.extend(rows[:headRows])
+        tgroup += thead
+    tbody = nodes.tbody()
+    tbody.extend(rows[headRows:])
+    tgroup += tbody
+    return table
+
+def visit_compact_table(self, node):
+    """Write a compact_table with the HTML5 translator of Sphinx.
+
+    The markup is the same as for the classic table. Other translators
+    get the classic table.
+    """
+    if not hasattr(self, '_table_row_indices'):
+        expandTable(node).walkabout(self)
+        raise nodes.SkipNode
+    self.visit_table(node)
+    body = self.body
+    children = node.children
+    start = 0
+    while start < len(children) and not isinstance(children[start],
+                                                   nodes.entry):
+        children[start].walkabout(self)
+        start += 1
+    # The colspecs give the stubs and may produce a <colgroup>. This is
+    # the only part that still needs nodes.
+    tgroup = nodes.tgroup(cols=len(node['colspecs']))
+    tgroup.parent = node
+    for attributes in node['colspecs']:
+        tgroup += nodes.colspec(**attributes)
+    tgroup.walkabout(self)
+    stubs = tgroup.stubs
+    headRows = node['headrows']
+    rowLengths = node['rowlengths']
+    rowIndices = self._table_row_indices
+    if headRows:
+        body.append('<thead>\n')
+    for rowNum, length in enumerate(rowLengths):
+        if rowNum == headRows:
+            if headRows:
+                body.append('</thead>\n')
+            body.append('<tbody>\n')
+        rowIndices[-1] += 1
+        if rowIndices[-1] % 2 == 0:
+            body.append('<tr class="row-even">')
+        else:
+            body.append('<tr class="row-odd">')
+        column = 0
+        for entry in children[start:start + length]:
+            atts = {}
+            classes = []
+            if rowNum < headRows:
+                classes.append('head')
+            if stubs[column]:
+                classes.append('stub')
+            if classes:
+                tagname = 'th'
+                atts['class'] = ' '.join(classes)
+            else:
+                tagname = 'td'
+            column += 1
+            if 'morerows' in entry:
+                atts['rowspan'] = entry['morerows'] + 1
+            if 'morecols' in entry:
+                atts['colspan'] = entry['morecols'] + 1
+                column += entry['morecols']
+            body.append(self.starttag(entry, tagname, '', **atts))
+            for child in entry.children:
+                child.walkabout(self)
+            body.append('</%s>\n' % tagname)
+        start += length
+        body.append('</tr>\n')
+    if len(rowLengths) <= headRows:
+        if headRows:
+            body.append('</thead>\n')
+        body.append('<tbody>\n')
+    body.append('</tbody>\n')
+    self.depart_table(node)
+    raise nodes.SkipNode
+
+def depart_compact_table(self, node):
+    pass
+
+def getBuilderFormat(env):
+    builderClass = getattr(env, '_builder_cls', None)
+    if builderClass is not None:
+        return builderClass.format
+    return env.app.builder.format
+
+class ExpandCompactTables(Transform):
+
+    """Replace compact tables by classic tables for non-HTML builders."""
+
+    # before the post-transforms of Sphinx
+    default_priority = 1
+
+    def apply(self, **kwargs):
+        if getBuilderFormat(self.document.settings.env) == 'html':
+            return
+        for node in list(traverse(self.document, compact_table)):
+            node.replace_self(expandTable(node))
+
+
+def merge_table_cache(app, env, docnames, other):
+    cache = getattr(other, 't3fieldlisttable_cache', None)
+    if not isinstance(cache, TableCache):
+        return
+    if not isinstance(getattr(env, 't3fieldlisttable_cache', None),
+                      TableCache):
+        env.t3fieldlisttable_cache = TableCache(cache.maxsize)
+    # `other` also has the entries of the documents read before it forked
+    for key, value in cache.data.items():
+        if value[0] in docnames:
+            env.t3fieldlisttable_cache.put(key, value)
+
+
+def purge_table_cache(app, env, docname):
+    cache = getattr(env, 't3fieldlisttable_cache', None)
+    if isinstance(cache, TableCache):
+        cache.purge(docname)
+
+
+def forget_purged_tables(app, env):
+    # documents that were purged and not read again have been removed
+    cache = getattr(env, 't3fieldlisttable_cache', None)
+    if isinstance(cache, TableCache):
+        cache.purged.clear()
+
+
+def merge_memory_records(app, env, docnames, other):
+    # `other` also has the records of the documents read before it forked
+    records = [r for r in getattr(other, 't3fieldlisttable_memory', None)
+               or () if r['document'] in docnames]
+    if not records:
+        return
+    if getattr(env, 't3fieldlisttable_memory', None) is None:
+        env.t3fieldlisttable_memory = []
+    env.t3fieldlisttable_memory.extend(records)
+
+
+def purge_memory_records(app, env, docname):
+    records = getattr(env, 't3fieldlisttable_memory', None)
+    if records:
+        records[:] = [r for r in records if r['document'] != docname]
+
+
+def write_memory_report(app, exception):
+    """Write the memory records of all tables, the largest peak first."""
+    filename = app.config.t3fieldlisttable_memory_report
+    records = getattr(app.env, 't3fieldlisttable_memory', None)
+    if exception is not None or not filename or not records:
+        return
+    records = sorted(records, key=lambda r: (r['peak'] or 0, r['retained']),
+                     reverse=True)
+    path = os.path.join(app.outdir, filename)
+    with io.open(path, 'w', encoding='utf-8') as f:
+        f.write(six.text_type(json.dumps({'tables': records}, indent=2,
+                                         sort_keys=True)))
+    from sphinx.util import logging
+    logger = logging.getLogger(__name__)
+    logger.info('t3fieldlisttable: memory of %s tables written to %s'
+                % (len(records), path))
+    for r in records[:5]:
+        logger.info('  %(document)s:%(line)s  %(rows)s rows x %(columns)s '
+                    'columns  peak %(peak)s  retained %(retained)s bytes' % r)
+
+
+def merge_stats_records(app, env, docnames, other):
+    # `other` also has the records of the documents read before it forked
+    records = [r for r in getattr(other, 't3fieldlisttable_stats', None)
+               or () if r['document'] in docnames]
+    if not records:
+        return
+    if getattr(env, 't3fieldlisttable_stats', None) is None:
+        env.t3fieldlisttable_stats = []
+    env.t3fieldlisttable_stats.extend(records)
+
+
+def purge_stats_records(app, env, docname):
+    records = getattr(env, 't3fieldlisttable_stats', None)
+    if records:
+        records[:] = [r for r in records if r['document'] != docname]
+
+
+STATS_FIELDS = ('tables', 'rows', 'cells', 'spans', 'seconds')
+
+def summarizeStats(records, slowest):
+    """Return the totals, the totals per document and the slowest tables."""
+    def newSums():
+        sums = dict.fromkeys(STATS_FIELDS, 0)
+        sums['seconds'] = 0.0
+        return sums
+    total = newSums()
+    documents = {}
+    for r in records:
+        sums = documents.get(r['document'])
+        if sums is None:
+            sums = documents[r['document']] = newSums()
+            sums['document'] = r['document']
+        for name in STATS_FIELDS:
+            sums[name] += r[name]
+            total[name] += r[name]
+    total['documents'] = len(documents)
+    records = sorted(records, key=lambda r: r['seconds'], reverse=True)
+    return {
+        'total': total,
+        'documents': [documents[name] for name in sorted(documents)],
+        'slowest': records[:slowest],
+    }
+
+
+def writeStatsCsv(path, summary):
+    """Write `summary` as CSV, the `kind` column tells the lines apart."""
+    header = ('kind', 'document', 'line') + STATS_FIELDS
+    lines = [dict(summary['total'], kind='total')]
+    lines.extend(dict(sums, kind='document')
+                 for sums in summary['documents'])
+    lines.extend(dict(r, kind='slowest') for r in summary['slowest'])
+    if six.PY2:
+        f = open(path, 'wb')
+    else:
+        f = io.open(path, 'w', encoding='utf-8', newline='')
+    with f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for line in lines:
+            values = [line.get(name, '') for name in header]
+            if six.PY2:
+                values = [six.text_type(v).encode('utf-8') for v in values]
+            writer.writerow(values)
+
+
+def write_stats_report(app, exception):
+    """Write the statistics of all tables as JSON or, for .csv, as CSV."""
+    filename = app.config.t3fieldlisttable_stats_report
+    records = getattr(app.env, 't3fieldlisttable_stats', None)
+    if exception is not None or not filename or records is None:
+        return
+    summary = summarizeStats(records,
+                             app.config.t3fieldlisttable_stats_slowest)
+    path = os.path.join(app.outdir, filename)
+    if filename.lower().endswith('.csv'):
+        writeStatsCsv(path, summary)
+    else:
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(six.text_type(json.dumps(summary, indent=2,
+                                             sort_keys=True)))
+    from sphinx.util import logging
+    logger = logging.getLogger(__name__)
+    total = summary['total']
+    logger.info('t3fieldlisttable: %(tables)s tables, %(rows)s rows, '
+                '%(cells)s cells in %(documents)s documents, %(seconds).3fs'
+                % total)
+    logger.info('t3fieldlisttable: statistics written to %s' % path)
+
+
+def write_table_profile(app, doctree):
+    directory = app.config.t3fieldlisttable_profile
+    if directory:
+        dumpTableProfile(doctree, os.path.join(
+            app.outdir, directory, app.env.docname + '.pstats'))
+
+
 def setup(app):
     app.add_directive('t3-field-list-table', FieldListTable)
+    # Opt-in timing of the directive phases. Tables that take longer than
+    # the time budget (seconds) produce a warning.
+    app.add_config_value('t3fieldlisttable_instrument', False, '')
+    app.add_config_value('t3fieldlisttable_time_budget', 1.0, '')
+    # Number of built tables kept in the environment to be reused when a
+    # document is read again. 0 turns the cache off.
+    app.add_config_value('t3fieldlisttable_cache_size', 0, '')
+    # 'classic', 'fused' (one pass over the bullet list) or 'streaming'
+    # (one pass, each source row is freed once its row is built)
+    app.add_config_value('t3fieldlisttable_engine', 'classic', '')
+    # Check the field names of the raw content before parsing the cells
+    app.add_config_value('t3fieldlisttable_prescan', False, '')
+    # Number of parsed cell bodies kept for cells with the same text.
+    # 0 parses all of the content at once as usual.
+    app.add_config_value('t3fieldlisttable_cell_cache_size', 0, '')
+    # Only check the tables, as with ':transformation: validate'
+    app.add_config_value('t3fieldlisttable_validate', False, 'env')
+    # Report all errors of a table at once instead of the first one
+    app.add_config_value('t3fieldlisttable_collect_errors', False, 'env')
+    # Return tables as compact_table nodes. HTML builders write them
+    # directly, the other builders get classic tables.
+    app.add_config_value('t3fieldlisttable_compact_nodes', False, 'env')
+    app.add_enumerable_node(compact_table, 'table',
+                            html=(visit_compact_table, depart_compact_table))
+    app.add_post_transform(ExpandCompactTables)
+    # File name below the output directory for a report of the memory
+    # used by each table, measured with tracemalloc. '' turns it off.
+    app.add_config_value('t3fieldlisttable_memory_report', '', '')
+    # File name below the output directory for statistics of all tables:
+    # counts and seconds per document and the slowest tables. JSON, or
+    # CSV if the name ends with '.csv'. '' turns it off. Documents are
+    # read again when it changes, so the totals cover all of them.
+    app.add_config_value('t3fieldlisttable_stats_report', '', 'env')
+    app.add_config_value('t3fieldlisttable_stats_slowest', 10, '')
+    # Folder below the output directory for a cProfile profile of the
+    # tables of each document (<docname>.pstats). '' turns it off.
+    app.add_config_value('t3fieldlisttable_profile', '', '')
+    # Only profile every nth table
+    app.add_config_value('t3fieldlisttable_profile_sample', 1, '')
+    app.connect('env-merge-info', merge_table_cache)
+    app.connect('env-merge-info', merge_memory_records)
+    app.connect('env-merge-info', merge_stats_records)
+    app.connect('env-purge-doc', purge_table_cache)
+    app.connect('env-purge-doc', purge_memory_records)
+    app.connect('env-purge-doc', purge_stats_records)
+    app.connect('env-updated', forget_purged_tables)
+    app.connect('build-finished', write_memory_report)
+    app.connect('build-finished', write_stats_report)
+    app.connect('doctree-read', write_table_profile)
     return {
         "version": "0.3.1",
         "parallel_read_safe": True,
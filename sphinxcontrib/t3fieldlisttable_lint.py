@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Check all field-list-tables of a documentation tree without Sphinx.
+
+Every ``t3-field-list-table`` and ``field-list-table`` directive found in
+the ``.rst`` files is validated with the rules of ``FieldListTable``. The
+files are spread over a process pool and the errors are written as JSON.
+Files that did not change since the last run are taken from a cache.
+
+Example::
+
+   t3fieldlisttable-lint Documentation --jobs 4 --output errors.json
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+
+import argparse
+import fnmatch
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+
+from docutils.core import publish_doctree
+from docutils.parsers.rst.directives import register_directive
+
+from sphinxcontrib import t3fieldlisttable
+from sphinxcontrib.t3fieldlisttable import FieldListTable
+
+DIRECTIVE_NAMES = ('t3-field-list-table', 'field-list-table')
+DIRECTIVE_RE = re.compile(r'( *)\.\.\s+(%s)::' % '|'.join(DIRECTIVE_NAMES))
+DEFAULT_CACHE = '.t3fieldlisttable-lint.json'
+
+SETTINGS = {
+    'report_level': 5,
+    'halt_level': 5,
+    'warning_stream': False,
+    '_disable_config': True,
+    'file_insertion_enabled': False,
+    'raw_enabled': False,
+    'field_list_table_validate': True,
+    'field_list_table_collect_errors': True,
+}
+
+
+class LintFieldListTable(FieldListTable):
+
+    """FieldListTable that remembers its errors in `found`."""
+
+    found = []
+
+    def run(self):
+        if 'file' in self.options:
+            # rows from a data file are only checked in a real build
+            return []
+        result = FieldListTable.run(self)
+        for rowNum, colNum, msg in self.errors or ():
+            LintFieldListTable.found.append({
+                'directive': self.name,
+                'line': self.lineno,
+                'colNum': colNum,
+                'rowNum': rowNum,
+                'message': msg,
+            })
+        if self.errorstr is not None and not self.errors:
+            LintFieldListTable.found.append({
+                'directive': self.name,
+                'line': self.lineno,
+                'colNum': self.colNum,
+                'rowNum': self.rowNum,
+                'message': self.errorstr,
+            })
+        return result
+
+
+def getRulesVersion():
+    """Return a hash of the code that decides what an error is."""
+    sha = hashlib.sha1()
+    for module in (t3fieldlisttable, sys.modules[__name__]):
+        filename = module.__file__
+        if filename.endswith(('.pyc', '.pyo')):
+            filename = filename[:-1]
+        with open(filename, 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def findDirectiveBlocks(text):
+    """Yield `(firstLine, lines)` for each field-list-table in `text`.
+
+    `firstLine` is the index of the directive line, `lines` the directive
+    with its indented content, without the common indentation.
+    """
+    lines = [line.expandtabs(8).rstrip() for line in text.splitlines()]
+    for i, line in enumerate(lines):
+        match = DIRECTIVE_RE.match(line)
+        if match is None:
+            continue
+        indent = len(match.group(1))
+        end = i + 1
+        last = i
+        while end < len(lines):
+            line = lines[end]
+            if line:
+                if len(line) - len(line.lstrip()) <= indent:
+                    break
+                last = end
+            end += 1
+        yield i, [line[indent:] for line in lines[i:last + 1]]
+
+
+def lintSource(text):
+    """Return the errors of all field-list-tables in `text`."""
+    for name in DIRECTIVE_NAMES:
+        register_directive(name, LintFieldListTable)
+    errors = []
+    seen = set()
+    for firstLine, lines in findDirectiveBlocks(text):
+        LintFieldListTable.found = []
+        publish_doctree('\n'.join(lines) + '\n',
+                        settings_overrides=SETTINGS)
+        for error in LintFieldListTable.found:
+            error['line'] += firstLine
+            key = (error['line'], error['message'])
+            if not key in seen:
+                seen.add(key)
+                errors.append(error)
+    errors.sort(key=lambda error: error['line'])
+    return errors
+
+
+def lintFile(args):
+    path, text = args
+    try:
+        return path, lintSource(text), None
+    except Exception as e:
+        return path, [], '%s: %s' % (e.__class__.__name__, e)
+
+
+def findFiles(paths, exclude=()):
+    """Return the sorted ``.rst`` files in `paths`."""
+    result = []
+    for path in paths:
+        if os.path.isfile(path):
+            result.append(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted([d for d in dirnames
+                                  if not d.startswith('.')])
+            for filename in filenames:
+                if not filename.endswith('.rst'):
+                    continue
+                filepath = os.path.join(dirpath, filename)
+                if any(fnmatch.fnmatch(filepath, pattern)
+                       for pattern in exclude):
+                    continue
+                result.append(filepath)
+    return sorted(result)
+
+
+def loadCache(filename, rulesVersion):
+    if not filename or not os.path.exists(filename):
+        return {}
+    try:
+        with io.open(filename, encoding='utf-8') as f:
+            data = json.load(f)
+    except ValueError:
+        return {}
+    if data.get('rules') != rulesVersion:
+        return {}
+    return data.get('files', {})
+
+
+def saveCache(filename, rulesVersion, files):
+    with io.open(filename, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'rules': rulesVersion, 'files': files},
+                           indent=1, sort_keys=True,
+                           ensure_ascii=False))
+
+
+def lintFiles(filenames, jobs=1, cacheFile=None):
+    """Lint `filenames` and return the report as a dictionary."""
+    rulesVersion = getRulesVersion()
+    cache = loadCache(cacheFile, rulesVersion)
+    newCache = {}
+    todo = []
+    report = {'files': len(filenames), 'checked': 0, 'cached': 0,
+              'errors': [], 'failures': []}
+    for filename in filenames:
+        with io.open(filename, encoding='utf-8-sig') as f:
+            text = f.read()
+        sha = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        cached = cache.get(filename)
+        if cached is not None and cached['sha1'] == sha:
+            newCache[filename] = cached
+            report['cached'] += 1
+        else:
+            newCache[filename] = {'sha1': sha, 'errors': []}
+            if '-list-table::' in text:
+                todo.append((filename, text))
+    if jobs > 1 and len(todo) > 1:
+        pool = multiprocessing.Pool(jobs)
+        try:
+            results = list(pool.imap_unordered(lintFile, todo))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [lintFile(args) for args in todo]
+    for filename, errors, failure in results:
+        report['checked'] += 1
+        if failure is None:
+            newCache[filename]['errors'] = errors
+        else:
+            # try again next time
+            del newCache[filename]
+            report['failures'].append({'file': filename,
+                                       'message': failure})
+    for filename in filenames:
+        for error in newCache.get(filename, {}).get('errors', []):
+            error = dict(error)
+            error['file'] = filename
+            report['errors'].append(error)
+    if cacheFile:
+        saveCache(cacheFile, rulesVersion, newCache)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Check the field-list-tables of reST files.')
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help='.rst file or folder to search')
+    parser.add_argument('--jobs', '-j', type=int,
+                        default=multiprocessing.cpu_count(),
+                        help='number of processes')
+    parser.add_argument('--exclude', action='append', default=[],
+                        metavar='PATTERN',
+                        help='skip files matching this glob pattern')
+    parser.add_argument('--cache', default=DEFAULT_CACHE, metavar='FILE',
+                        help='results of unchanged files (default: %s)'
+                        % DEFAULT_CACHE)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='check all files and write no cache')
+    parser.add_argument('--output', '-o', metavar='FILE',
+                        help='write the JSON report to FILE')
+    args = parser.parse_args(argv)
+
+    filenames = findFiles(args.paths, args.exclude)
+    cacheFile = None if args.no_cache else args.cache
+    report = lintFiles(filenames, max(1, args.jobs), cacheFile)
+    data = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(data + '\n')
+    else:
+        print(data)
+    if report['errors'] or report['failures']:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+The error messages of the t3-field-list-table directive.
+
+Run with ``python -m pytest test``.
+"""
+
+from __future__ import absolute_import
+
+import pytest
+from docutils import nodes
+from docutils.core import publish_doctree
+from docutils.parsers.rst.directives import register_directive
+
+from sphinxcontrib.t3fieldlisttable import FieldListTable
+
+register_directive('t3-field-list-table', FieldListTable)
+
+
+def getErrors(source, **settings):
+    """Return the texts of the system messages of `source`."""
+    overrides = {'report_level': 5, 'halt_level': 5,
+                 '_disable_config': True}
+    for name, value in settings.items():
+        overrides['field_list_table_' + name] = value
+    doctree = publish_doctree(source, settings_overrides=overrides)
+    return [node.astext() for node in doctree.traverse(nodes.system_message)]
+
+
+def makeTable(rows, options=''):
+    return '.. t3-field-list-table::\n%s\n%s\n' % (options, rows)
+
+
+# one broken table for each kind of error
+BROKEN_TABLES = {
+    'more than a field list': makeTable(
+        ' - :a: A\n\n   Text\n - :a: 1\n'),
+    'no field list': makeTable(
+        ' - :a: A\n - Text\n'),
+    'colspan in the definition row': makeTable(
+        ' - :a..b: A\n - :a: 1\n'),
+    'rowspan in the definition row': makeTable(
+        ' - :(a): A\n - :a: 1\n'),
+    'duplicate column': makeTable(
+        ' - :a: A\n   :a: B\n - :a: 1\n'),
+    'illegal field name': makeTable(
+        ' - :a: A\n - :(a: 1\n'),
+    'unknown column': makeTable(
+        ' - :a: A\n - :c: 1\n'),
+    'wrong order': makeTable(
+        ' - :a: A\n   :b: B\n - :b..a: 1\n'),
+    'specified more than once': makeTable(
+        ' - :a: A\n   :b: B\n - :a..b: 1\n   :b: 2\n'),
+    'content in a rowspan': makeTable(
+        ' - :a: A\n - :a: 1\n - :(a): 2\n'),
+    'rowspan mismatch': makeTable(
+        ' - :a: A\n   :b: B\n - :a..b: first field wrapped\n'
+        '     onto a second line\n - :(a):\n   :b: x\n'),
+    'rowspan below a colspan': makeTable(
+        ' - :a: A\n   :b: B\n - :a..b: 1\n - :(a):\n   :b: x\n'),
+    'rowspan in the first body row': makeTable(
+        ' - :a: A\n - :(a):\n - :a: 1\n', ' :header-rows: 1\n'),
+    'too many header rows': makeTable(
+        ' - :a: A\n - :a: 1\n', ' :header-rows: 3\n'),
+    'only header rows': makeTable(
+        ' - :a: A\n - :a: 1\n', ' :header-rows: 2\n'),
+    'too many stub columns': makeTable(
+        ' - :a: A\n - :a: 1\n', ' :stub-columns: 2\n'),
+    'only stub columns': makeTable(
+        ' - :a: A\n - :a: 1\n', ' :stub-columns: 1\n'),
+    'unknown alignment': makeTable(
+        ' - :a: A\n   :b: B\n - :b,,xx: 1\n'),
+    'errors in two rows': makeTable(
+        ' - :a: A\n   :b: B\n - :c: 1\n - :(a):\n   :b: x\n'),
+}
+
+
+@pytest.mark.parametrize('name', sorted(BROKEN_TABLES))
+@pytest.mark.parametrize('engine', ['fused', 'streaming'])
+@pytest.mark.parametrize('cellCacheSize', [0, 64])
+@pytest.mark.parametrize('prescan', [True, False])
+@pytest.mark.parametrize('collectErrors', [False, True])
+def test_engines_report_like_classic(name, engine, cellCacheSize, prescan,
+                                     collectErrors):
+    source = BROKEN_TABLES[name]
+    settings = {'cell_cache_size': cellCacheSize, 'prescan': prescan,
+                'collect_errors': collectErrors}
+    expected = getErrors(source, engine='classic', **settings)
+    assert expected
+    assert getErrors(source, engine=engine, **settings) == expected
+
+
+def getCollected(source):
+    """Return the lines of the collected errors of `source`."""
+    errors, = getErrors(source, collect_errors=True)
+    report = errors.split('Errors:\n\n', 1)[1]
+    return report.split('\n\n', 1)[0].splitlines()
+
+
+def test_collect_skips_rowspans_below_a_failed_field():
+    source = makeTable(' - :a: A\n   :b: B\n - :c: 1\n - :(a..b):\n')
+    assert getCollected(source) == [
+        "rowNum: 1  Field 'c' of range 'c' does not exist."]
+
+
+def test_collect_skips_rowspans_below_a_failed_colspan():
+    source = makeTable(' - :a: A\n   :b: B\n - :a..b,,xx: 1\n'
+                       ' - :(a..b):\n')
+    assert getCollected(source) == [
+        "rowNum: 1, colNum: 0  Unknown alignment 'xx'."]
+
+
+def test_collect_keeps_the_column_of_a_failed_field():
+    source = makeTable(' - :a: A\n   :b: B\n - :b,,xx: 1\n')
+    assert getCollected(source) == [
+        "rowNum: 1, colNum: 1  Unknown alignment 'xx'."]
+
+
+def test_collect_reports_stub_columns_once():
+    source = makeTable(' - :a: A\n - :a: 1\n - :a: 2\n',
+                       ' :stub-columns: 2\n')
+    assert getCollected(source) == [
+        "rowNum: 0  2 stub column(s) specified but only 1 column(s) "
+        "supplied."]